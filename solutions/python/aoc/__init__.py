@@ -17,4 +17,6 @@ def timer(func):
 		res = func(*args, **kwargs)
 		print(f"\nTime required: {(time.time() - start_time)*1000:.2f} ms\n")
 		return res
-	return wrapper
\ No newline at end of file
+	return wrapper
+
+from . import grid
@@ -0,0 +1,191 @@
+import random
+
+import numpy as np
+
+"""
+A dense 2D grid over integer (x, y) coordinates, held in a NumPy array that grows to fit.
+
+The array is indexed [y - y0, x - x0], where (x0, y0) is the coordinate of its first cell, so negative coordinates are
+fine.  When a write lands outside the array it is reallocated at (at least) double the size along the axes that were
+too small, with the spare room on the side the grid is growing towards, so a walk in any direction costs amortised
+O(1) per step.
+
+The bounds of every cell written are kept as they are written, there is no need to scan the grid for them.
+"""
+
+
+class Grid:
+
+	def __init__(self, dtype=np.int8, fill=0, shape=(8, 8)):
+		"""
+		Arguments:
+			dtype: The NumPy dtype of the cells
+			fill: The value of every cell never written
+			shape: The initial (rows, columns) to allocate
+		"""
+		self.fill = fill
+		self.data = np.full(shape, fill, dtype=dtype)
+		self.x0 = 0
+		self.y0 = 0
+		self.min_x = self.max_x = self.min_y = self.max_y = None
+
+	@classmethod
+	def from_array(cls, array, x0=0, y0=0, fill=0):
+		# Wrap a [y, x] array, every cell of it counts as written
+		grid = cls(dtype=array.dtype, fill=fill, shape=(0, 0))
+		grid.data = np.array(array)
+		grid.x0, grid.y0 = x0, y0
+		if array.size:
+			grid.min_x, grid.max_x = x0, x0 + array.shape[1] - 1
+			grid.min_y, grid.max_y = y0, y0 + array.shape[0] - 1
+		return grid
+
+	@staticmethod
+	def _extend(lo, size, v):
+		# The new (lo, size) along one axis so that v fits, doubling the size
+		if lo <= v < lo + size:
+			return lo, size
+		new_size = max(2 * size, 1)
+		if v < lo:
+			new_size = max(new_size, lo + size - v)
+			return lo + size - new_size, new_size
+		return lo, max(new_size, v - lo + 1)
+
+	def reserve(self, x, y):
+		# Make sure (x, y) is inside the array
+		h, w = self.data.shape
+		x0, new_w = self._extend(self.x0, w, x)
+		y0, new_h = self._extend(self.y0, h, y)
+		if (x0, y0, new_w, new_h) == (self.x0, self.y0, w, h):
+			return
+
+		data = np.full((new_h, new_w), self.fill, dtype=self.data.dtype)
+		data[self.y0 - y0:self.y0 - y0 + h, self.x0 - x0:self.x0 - x0 + w] = self.data
+		self.data, self.x0, self.y0 = data, x0, y0
+
+	def __getitem__(self, pos):
+		x, y = pos
+		row, col = y - self.y0, x - self.x0
+		if 0 <= row < self.data.shape[0] and 0 <= col < self.data.shape[1]:
+			return self.data[row, col].item()
+		return self.fill
+
+	def __setitem__(self, pos, value):
+		x, y = pos
+		self.reserve(x, y)
+		self.data[y - self.y0, x - self.x0] = value
+
+		if self.min_x is None:
+			self.min_x = self.max_x = x
+			self.min_y = self.max_y = y
+			return
+		if x < self.min_x:
+			self.min_x = x
+		elif x > self.max_x:
+			self.max_x = x
+		if y < self.min_y:
+			self.min_y = y
+		elif y > self.max_y:
+			self.max_y = y
+
+	def get(self, pos):
+		# The same as grid[pos], a cell never written reads as fill
+		return self[pos]
+
+	@property
+	def bounds(self):
+		# ((min_x, max_x), (min_y, max_y)) of the cells written, inclusive.  None if nothing was written
+		if self.min_x is None:
+			return None
+		return (self.min_x, self.max_x), (self.min_y, self.max_y)
+
+	def window(self, x_bounds=None, y_bounds=None):
+		"""
+		A [y, x] view of the cells between the inclusive bounds, which default to the bounds of the written cells.
+
+		The array is grown to cover the window if needed, so it is always a view.
+		"""
+		if x_bounds is None or y_bounds is None:
+			if self.min_x is None:
+				return self.data[:0, :0]
+			x_bounds = x_bounds or (self.min_x, self.max_x)
+			y_bounds = y_bounds or (self.min_y, self.max_y)
+		self.reserve(x_bounds[0], y_bounds[0])
+		self.reserve(x_bounds[1], y_bounds[1])
+		return self.data[y_bounds[0] - self.y0:y_bounds[1] - self.y0 + 1, x_bounds[0] - self.x0:x_bounds[1] - self.x0 + 1]
+
+	def count(self, value) -> int:
+		return int((self.window() == value).sum())
+
+	def positions(self, value):
+		# All (x, y) holding value, within the bounds of the written cells
+		if self.min_x is None:
+			return []
+		return [(int(col) + self.min_x, int(row) + self.min_y) for row, col in np.argwhere(self.window() == value)]
+
+	def char_array(self, chars, x_bounds=None, y_bounds=None):
+		# A [y, x] array of characters, chars[value] for each cell in the window
+		return np.array(list(chars))[self.window(x_bounds, y_bounds).astype(np.intp)]
+
+	def render(self, chars, x_bounds=None, y_bounds=None, flip_y=False) -> str:
+		"""
+		Render the window as text, one character per cell looked up by value in chars.
+
+		Rows run from the smallest y down, flip_y puts the largest y at the top.
+		"""
+		rows = self.char_array(chars, x_bounds, y_bounds)
+		if flip_y:
+			rows = rows[::-1]
+		return "\n".join("".join(row) for row in rows)
+
+
+def test_grid():
+	# Random walks in every direction, checked against a dict of the cells written
+	rng = random.Random(0)
+	steps = {'U': (0, -1), 'D': (0, 1), 'L': (-1, 0), 'R': (1, 0)}
+	for walk in range(20):
+		grid = Grid(dtype=np.int16, fill=-1, shape=(2, 2))
+		cells = {}
+		x = y = 0
+		for _ in range(300):
+			dx, dy = steps[rng.choice('UDLR' if walk % 5 else 'L')]  # Some walks head one way only
+			x, y = x + dx, y + dy
+			cells[(x, y)] = grid[(x, y)] = rng.randrange(4)
+
+		for pos, value in cells.items():
+			assert grid[pos] == value
+		assert grid.get((x + 1000, y - 1000)) == -1
+
+		xs, ys = [p[0] for p in cells], [p[1] for p in cells]
+		assert grid.bounds == ((min(xs), max(xs)), (min(ys), max(ys)))
+
+		for value in range(4):
+			expected = sorted(pos for pos, v in cells.items() if v == value)
+			assert sorted(grid.positions(value)) == expected
+			assert grid.count(value) == len(expected)
+
+		# Explicit bounds past the written cells read as fill
+		x_bounds, y_bounds = (min(xs) - 2, max(xs) + 3), (min(ys) - 1, max(ys) + 1)
+		window = grid.window(x_bounds, y_bounds)
+		assert window.shape == (y_bounds[1] - y_bounds[0] + 1, x_bounds[1] - x_bounds[0] + 1)
+		for row in range(window.shape[0]):
+			for col in range(window.shape[1]):
+				pos = (col + x_bounds[0], row + y_bounds[0])
+				assert window[row, col] == cells.get(pos, -1)
+
+	# An empty grid has no bounds, cells or text
+	grid = Grid()
+	assert grid.bounds is None
+	assert grid.window().shape == (0, 0)
+	assert grid.positions(0) == []
+	assert grid.count(0) == 0
+	assert grid.render(' #') == ''
+
+	grid[(-3, 2)] = 1
+	assert grid.render(' #', (-4, -2), (2, 2)) == ' # '
+
+	print("Grid tests passed")
+
+
+if __name__ == '__main__':
+	test_grid()
@@ -0,0 +1,156 @@
+import os
+import struct
+import tempfile
+import zlib
+
+import numpy as np
+
+"""
+Write 2D integer grids straight to image files, no plotting library needed.
+
+    write_pbm  P4 bitmap, nonzero cells are black (the PBM convention)
+    write_pgm  P5 greymap, 8 or 16 bit
+    write_png  Greyscale PNG, 8 or 16 bit, compressed with zlib
+
+Grids are [row, column] arrays, the first row at the top.  Anything with a window() method (an aoc.grid.Grid) is
+converted with it.  Each writer builds the whole file in memory and writes it once.
+"""
+
+
+def as_array(grid, scale: int=1):
+	# A 2D integer array of the grid, every cell blown up to scale x scale pixels
+	if hasattr(grid, 'window'):
+		grid = grid.window()
+	array = np.asarray(grid)
+	if array.ndim != 2:
+		raise ValueError("Expected a 2D grid, got shape {}".format(array.shape))
+	if array.dtype == bool:
+		array = array.astype(np.uint8)
+	if scale > 1:
+		array = array.repeat(scale, axis=0).repeat(scale, axis=1)
+	return array
+
+
+def grey_levels(array, maxval=None):
+	# Map 0..maxval onto the full range of an 8 or 16 bit grey, returning (levels, bit_depth)
+	if array.size and array.min() < 0:
+		raise ValueError("Negative values can't be written as grey levels")
+	maxval = maxval or int(array.max(initial=0)) or 1
+	bit_depth = 8 if maxval <= 255 else 16
+	top = (1 << bit_depth) - 1
+	levels = (array.astype(np.int64) * top // maxval).clip(0, top)
+	return levels.astype('>u1' if bit_depth == 8 else '>u2'), bit_depth
+
+
+def write_pbm(filename: str, grid, scale: int=1):
+	array = as_array(grid, scale)
+	height, width = array.shape
+	bits = np.packbits(array != 0, axis=1)  # Each row padded to a whole byte, as PBM wants
+	with open(filename, 'wb') as f:
+		f.write(b'P4\n%d %d\n' % (width, height) + bits.tobytes())
+
+
+def write_pgm(filename: str, grid, maxval=None, scale: int=1):
+	array = as_array(grid, scale)
+	height, width = array.shape
+	levels, bit_depth = grey_levels(array, maxval)
+	with open(filename, 'wb') as f:
+		f.write(b'P5\n%d %d\n%d\n' % (width, height, (1 << bit_depth) - 1) + levels.tobytes())
+
+
+def _png_chunk(tag: bytes, data: bytes):
+	return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def write_png(filename: str, grid, maxval=None, scale: int=1, level: int=6):
+	array = as_array(grid, scale)
+	height, width = array.shape
+	levels, bit_depth = grey_levels(array, maxval)
+
+	# Every scanline starts with filter type 0, no filtering
+	rows = levels.view(np.uint8).reshape(height, -1)
+	raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), rows])
+
+	header = struct.pack('>IIBBBBB', width, height, bit_depth, 0, 0, 0, 0)  # Greyscale, no interlace
+	with open(filename, 'wb') as f:
+		f.write(b'\x89PNG\r\n\x1a\n'
+			+ _png_chunk(b'IHDR', header)
+			+ _png_chunk(b'IDAT', zlib.compress(raw.tobytes(), level))
+			+ _png_chunk(b'IEND', b''))
+
+
+def write_image(filename: str, grid, **kwargs):
+	# Pick the writer from the file extension
+	writers = {'pbm': write_pbm, 'pgm': write_pgm, 'png': write_png}
+	ext = filename.rsplit('.', 1)[-1].lower()
+	if ext not in writers:
+		raise ValueError("Unknown image type: {}".format(filename))
+	writers[ext](filename, grid, **kwargs)
+
+
+def _read_png(data: bytes):
+	# Parse a greyscale PNG from write_png, checking every chunk's CRC.  Returns (width, height, bit_depth, rows)
+	assert data[:8] == b'\x89PNG\r\n\x1a\n'
+	chunks, offset = {}, 8
+	while offset < len(data):
+		length, = struct.unpack_from('>I', data, offset)
+		tag, body = data[offset + 4:offset + 8], data[offset + 8:offset + 8 + length]
+		crc, = struct.unpack_from('>I', data, offset + 8 + length)
+		assert crc == zlib.crc32(tag + body), "Bad CRC on {}".format(tag)
+		chunks[tag] = body
+		offset += length + 12
+	assert list(chunks) == [b'IHDR', b'IDAT', b'IEND']
+
+	width, height, bit_depth, colour, _, _, interlace = struct.unpack('>IIBBBBB', chunks[b'IHDR'])
+	assert (colour, interlace) == (0, 0)
+	raw = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8).reshape(height, -1)
+	assert not raw[:, 0].any()  # Filter type 0 on every scanline
+	rows = raw[:, 1:].copy().view('>u1' if bit_depth == 8 else '>u2')
+	return width, height, bit_depth, rows
+
+
+def test_image():
+	rng = np.random.default_rng(0)
+	with tempfile.TemporaryDirectory() as tmp:
+		path = os.path.join(tmp, 'image')
+
+		# 8 and 16 bit greys, levels stretched to the full range
+		for maxval, bit_depth in ((255, 8), (1000, 16)):
+			array = rng.integers(0, maxval + 1, (5, 7))
+			top = (1 << bit_depth) - 1
+			write_png(path + '.png', array, maxval=maxval)
+			with open(path + '.png', 'rb') as f:
+				width, height, depth, rows = _read_png(f.read())
+			assert (width, height, depth) == (7, 5, bit_depth)
+			assert (rows == array * top // maxval).all()
+
+			write_image(path + '.pgm', array, maxval=maxval)
+			with open(path + '.pgm', 'rb') as f:
+				data = f.read()
+			header = b'P5\n7 5\n%d\n' % top
+			assert data.startswith(header)
+			levels = np.frombuffer(data[len(header):], dtype='>u1' if bit_depth == 8 else '>u2').reshape(5, 7)
+			assert (levels == array * top // maxval).all()
+
+		# Scaled up, each cell is a block of pixels
+		write_png(path + '.png', [[0, 1], [1, 0]], scale=3)
+		with open(path + '.png', 'rb') as f:
+			width, height, _, rows = _read_png(f.read())
+		assert (width, height) == (6, 6)
+		assert (rows == np.kron([[0, 1], [1, 0]], np.ones((3, 3), dtype=int)) * 255).all()
+
+		# P4 rows are padded to whole bytes, 11 pixels take 2 bytes a row
+		bits = rng.integers(0, 2, (3, 11))
+		write_pbm(path + '.pbm', bits)
+		with open(path + '.pbm', 'rb') as f:
+			data = f.read()
+		assert data.startswith(b'P4\n11 3\n')
+		body = np.frombuffer(data[len(b'P4\n11 3\n'):], dtype=np.uint8).reshape(3, 2)
+		assert (np.unpackbits(body, axis=1)[:, :11] == bits).all()
+		assert not np.unpackbits(body, axis=1)[:, 11:].any()
+
+	print("Image tests passed")
+
+
+if __name__ == '__main__':
+	test_image()
@@ -1,9 +1,14 @@
-import os
+import sys
 import aoc
+from aoc.grid import Grid
 import intcode
 import enum
-from collections import defaultdict
+import struct
 import time
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 class TileID(enum.IntEnum):
 
@@ -14,6 +19,86 @@ class TileID(enum.IntEnum):
     BALL = 4
 
 
+CHAR_MAP = {
+    0: ' ',
+    1: '\u2588',
+    2: '\u2591',
+    3: '\u2501',
+    4: '\u25cf' 
+}
+
+
+class Board(Grid):
+
+    # Tiles that only ever appear once on the board, their positions are indexed as they are drawn
+    SINGLETONS = (TileID.PADDLE, TileID.BALL)
+
+    def __init__(self, dim=(25, 25)):
+        """
+        The arcade screen, an aoc.grid.Grid of tile ids that grows to fit whatever is drawn.
+
+        Alongside the tiles it keeps the position of the paddle and the ball and a running count of the blocks, so
+        none of these need a scan of the board.  Coordinates must be non-negative.
+        """
+        super().__init__(dtype=np.int8, fill=TileID.EMPTY.value, shape=(dim[1], dim[0]))
+        self.positions = {t_id: None for t_id in self.SINGLETONS}
+        self.blocks = 0
+
+    @classmethod
+    def from_array(cls, tiles):
+        # Build a board, indexes and all, from a [y, x] array of tile ids
+        board = cls((tiles.shape[1], tiles.shape[0]))
+        board.data[:, :] = tiles
+        board.blocks = int((tiles == TileID.BLOCK).sum())
+        for t_id in cls.SINGLETONS:
+            found = np.argwhere(tiles == t_id)
+            if len(found):
+                y, x = found[-1]
+                board.positions[t_id] = (int(x), int(y))
+        nonzero = np.argwhere(tiles)
+        if len(nonzero):
+            (board.min_y, board.min_x), (board.max_y, board.max_x) = nonzero.min(axis=0).tolist(), nonzero.max(axis=0).tolist()
+        return board
+
+    def __setitem__(self, pos, t_id):
+        x, y = pos
+        if x < 0 or y < 0:
+            raise IndexError("Negative board position: {}".format(pos))
+
+        old = self[pos]
+        super().__setitem__(pos, t_id)
+
+        if old == TileID.BLOCK:
+            self.blocks -= 1
+        if t_id == TileID.BLOCK:
+            self.blocks += 1
+
+        if old in self.positions and self.positions[old] == pos:
+            self.positions[old] = None
+        if t_id in self.positions:
+            self.positions[t_id] = pos
+
+    @property
+    def tiles(self):
+        # The [y, x] tile array, the board never grows left or up so (0, 0) is always its first cell
+        return self.data
+
+    @property
+    def dim(self):
+        # One past the largest x and y drawn
+        if self.min_x is None:
+            return 0, 0
+        return self.max_x + 1, self.max_y + 1
+
+    @property
+    def paddle(self):
+        return self.positions[TileID.PADDLE]
+
+    @property
+    def ball(self):
+        return self.positions[TileID.BALL]
+
+
 @aoc.timer
 def solve():
 
@@ -22,7 +107,7 @@ def solve():
     program = list(map(int, aoc.read_program('13.txt')))
     computer = intcode.IntCodeComputer(program, pause_on_output=True)
 
-    state = defaultdict[int]
+    state = Board()
 
     while computer.status != intcode.StatusFlag.FINISHED:
 
@@ -40,63 +125,238 @@ def solve():
 
             state[(x, y)] = t_id
 
-    total_block_tiles = sum([t_id == TileID.BLOCK.value for t_id in state.values()])
+    total_block_tiles = state.blocks
     print(f"Total Blocks: {total_block_tiles}")
 
 
+class FrameLog:
+
+    """
+    A compact binary log of a game, written as it is played.
+
+    The file starts with MAGIC and the keyframe interval, followed by records, each led by a one byte tag:
+        T  x (uint16), y (uint16), tile (uint8)     A tile changed
+        S  score (int64)                            The score changed
+        F  frame (uint32)                           End of a frame, one per joystick input
+        K  frame (uint32), width, height (uint16),  The whole board and score at the end of the frame,
+           score (int64), then width*height tiles   written every `keyframe_every` frames
+    All values are little endian.
+    """
+
+    MAGIC = b'AOC13FL1'
+    HEADER = struct.Struct('<8sI')
+    TILE = struct.Struct('<cHHB')
+    SCORE = struct.Struct('<cq')
+    FRAME = struct.Struct('<cI')
+    KEYFRAME = struct.Struct('<cIHHq')
+
+    def __init__(self, filename, keyframe_every=100):
+        self.f = open(filename, 'wb')
+        self.keyframe_every = keyframe_every
+        self.frame = 0
+        self.f.write(self.HEADER.pack(self.MAGIC, keyframe_every))
+
+    def tile(self, x, y, t_id):
+        self.f.write(self.TILE.pack(b'T', x, y, t_id))
+
+    def score(self, score):
+        self.f.write(self.SCORE.pack(b'S', score))
+
+    def end_frame(self, board: Board, score):
+        self.f.write(self.FRAME.pack(b'F', self.frame))
+        if self.frame % self.keyframe_every == 0:
+            width, height = board.dim
+            self.f.write(self.KEYFRAME.pack(b'K', self.frame, width, height, score))
+            self.f.write(np.ascontiguousarray(board.tiles[:height, :width], dtype=np.uint8).tobytes())
+        self.frame += 1
+
+    def close(self):
+        self.f.close()
+
+
+class DiffRenderer:
+
+    # Draw the board with ANSI cursor moves, only writing the tiles that changed since the last frame
+
+    CLEAR = '\x1b[2J'
+
+    def __init__(self, char_map, max_fps=None, stream=None):
+        self.char_map = char_map
+        self.min_interval = 1 / max_fps if max_fps else 0  # Frames closer together than this are dropped
+        self.stream = stream or sys.stdout
+        self.last_frame = None
+        self.max_y = 0
+
+    def draw(self, state, dirty, score, force=False):
+        # Returns True if a frame was written.  Dropped frames leave the dirty set alone to be drawn next time.
+        now = time.perf_counter()
+        if not force and self.last_frame is not None and now - self.last_frame < self.min_interval:
+            return False
+
+        out = [self.CLEAR] if self.last_frame is None else []
+        self.last_frame = now
+
+        for (x, y) in dirty:
+            out.append(f"\x1b[{y+1};{x+1}H{self.char_map[state[(x, y)]]}")
+            if y > self.max_y:
+                self.max_y = y
+        dirty.clear()
+
+        # Score below the board, then park the cursor on the line after for any input prompt
+        out.append(f"\x1b[{self.max_y+2};1HScore: {score}\x1b[K")
+        out.append(f"\x1b[{self.max_y+3};1H\x1b[K")
+
+        self.stream.write("".join(out))
+        self.stream.flush()
+        return True
+
+
+# Where the arcade program keeps its state in memory.  screen is the address of the [y, x] tile array,
+# the rest are the addresses of single cells
+ArcadeLayout = namedtuple("ArcadeLayout", ("screen", "width", "height", "ball_x", "ball_y", "paddle_x", "score"))
+
+
+def read_arcade_program():
+    program = list(map(int, aoc.read_program('13.txt')))
+    program[0] = 2  # Set up for unlimited play
+    return program
+
+
+def find_screen(memory, board: Board):
+    # The address of the board's tiles, stored row by row, in memory
+    width, height = board.dim
+    tiles = board.tiles[:height, :width].ravel().astype(memory.dtype)
+    matches = np.flatnonzero((sliding_window_view(memory, len(tiles)) == tiles).all(axis=1))
+    if len(matches) != 1:
+        raise ValueError("Found {} candidate screen locations".format(len(matches)))
+    return int(matches[0])
+
+
+def discover_layout(program=None, max_frames=2000) -> ArcadeLayout:
+    """
+    Find where the arcade program keeps its screen, ball, paddle and score in memory.
+
+    The autopilot plays while the output is decoded into a Board as usual.  The first frame's board is searched for in
+    memory to find the screen.  Every frame the addresses holding the current ball x, ball y, paddle x and score are
+    intersected with the previous frame's, until each is narrowed down to a single address.
+    """
+    program = program or read_arcade_program()
+    computer = intcode.IntCodeComputer(program)
+    board = Board()
+    score = 0
+    screen = None
+    candidates = {}
+
+    def frames():
+        nonlocal score, screen
+        for frame in range(max_frames):
+            outputs = computer.output_value or []
+            computer.output_value = None
+            for i in range(0, len(outputs), 3):
+                x, y, t_id = outputs[i:i+3]
+                if (x, y) == (-1, 0):
+                    score = t_id
+                else:
+                    board[(x, y)] = t_id
+
+            memory = np.array(computer.memory, dtype=np.int64)
+            if screen is None:
+                screen = find_screen(memory, board)
+
+            watched = {
+                'ball_x': board.ball[0],
+                'ball_y': board.ball[1],
+                'paddle_x': board.paddle[0],
+                'score': score
+            }
+            for name, value in watched.items():
+                found = set(np.flatnonzero(memory == value).tolist())
+                candidates[name] = candidates[name] & found if name in candidates else found
+
+            if all(len(found) == 1 for found in candidates.values()):
+                return  # Stopping the input pauses the computer
+            yield int(np.sign(board.ball[0] - board.paddle[0]))
+
+    computer.set_input_values(frames())
+    computer.run()
+
+    ambiguous = [name for name, found in candidates.items() if len(found) != 1]
+    if ambiguous:
+        raise ValueError("Could not locate {} within {} frames".format(", ".join(ambiguous), max_frames))
+
+    width, height = board.dim
+    cells = {name: found.pop() for name, found in candidates.items()}
+    return ArcadeLayout(screen, width, height, **cells)
+
+
 class Game:
 
-    def __init__(self, board_dim=(25,25), ai=False):
+    def __init__(self, board_dim=(25,25), ai=False, headless=False, max_fps=None, frame_log=None, keyframe_every=100,
+            layout: ArcadeLayout=None):
+        """
+        Arguments:
+            ai: Let the computer play
+            headless: Never draw the board, the game runs as fast as the computer can
+            max_fps: Cap the frame rate of the autopilot, frames in between are skipped.  Manual play draws every frame.
+            frame_log: A filename to record the game to, see FrameLog.  Play it back with day13_viewer.py
+            keyframe_every: Frames between full board keyframes in the log
+            layout: An ArcadeLayout from discover_layout().  The autopilot then reads the game straight out of the
+                    program's memory and never decodes the output.  Only for headless autopilot runs.
+        """
+        if layout is not None and not (ai and headless and frame_log is None):
+            raise ValueError("Reading the game from memory is only supported for headless autopilot runs")
+
         self.automated = ai
+        self.headless = headless
+        self.layout = layout
         game_input = self.game_input()
         next(game_input)
-        program = list(map(int, aoc.read_program('13.txt')))
-        program[0] = 2  # Set up for unlimited play
+        program = read_arcade_program()
 
-        self.computer = intcode.IntCodeComputer(program, input_user = game_input, pause_on_output=True)
+        if layout is None:
+            self.computer = intcode.IntCodeComputer(program, input_user = game_input, pause_on_output=True)
+        else:
+            # Plain list memory, the hot loop only ever reads single cells and NumPy boxing would slow every one
+            self.computer = intcode.IntCodeComputer(program, input_user = game_input)
         
-        self.state = defaultdict(int)
+        self.state = Board(board_dim)
+        self.dirty = set()      # Tiles changed since the last frame was drawn
         self.score = 0
         self.last_input = None
         self.board_dim = board_dim
-        self.char_map = {
-            0: ' ',
-            1: '\u2588',
-            2: '\u2591',
-            3: '\u2501',
-            4: '\u25cf' 
-        }
-
-    def find_board_dim(self):
-        # Find max x and y values in state
-        max_x = max_y = -1
-
-        for (x, y) in self.state:
-            if x > max_x:
-                max_x = x
-            if y > max_y:
-                max_y = y
-        return max_x+1, max_y+1
-
-    def print_board(self):
-        os.system('cls' if os.name == 'nt' else 'clear')
-        dim_x, dim_y = self.find_board_dim()
-        for i in range(dim_y):
-
-            row = "".join([self.char_map[self.state[(j, i)]] for j in range(dim_x)])
-            print(row)
-            
-            #if (self.char_map[3] in row) or (self.char_map[4] in row):
-            # Are there any characters not a wall or a block?
-            #    import pdb; pdb.set_trace()
+        self.char_map = CHAR_MAP
+        self.frame_log = None if frame_log is None else FrameLog(frame_log, keyframe_every)
+        self.renderer = None if headless else DiffRenderer(self.char_map, max_fps=max_fps)
+
+    def screen(self):
+        # A [y, x] array copied out of the program's own tile array, layout mode only
+        start, n = self.layout.screen, self.layout.height * self.layout.width
+        tiles = self.computer.memory[start:start + n]
+        tiles = np.array(tiles + [0] * (n - len(tiles)), dtype=np.int64)
+        return tiles.reshape(self.layout.height, self.layout.width)
 
-        print(f"Score: {self.score}\n")
+    def count_blocks(self):
+        if self.layout is not None:
+            return int((self.screen() == TileID.BLOCK).sum())
+        return self.state.blocks
+
+    def render(self, force=False):
+        if self.renderer is not None:
+            self.renderer.draw(self.state, self.dirty, self.score, force=force)
 
     def game_input(self):
         yield None  # Define the generator before the logic begins
 
         while True:
-            self.print_board()
+            if self.layout is not None:
+                # Nobody reads the output, drop it
+                self.computer.output_value = None
+                yield self.calculate_best_move()
+                continue
+
+            if self.frame_log is not None:
+                self.frame_log.end_frame(self.state, self.score)
+            self.render(force=not self.automated)
             if self.automated:
                 user_input = self.calculate_best_move()
                 # time.sleep(0.05)
@@ -113,23 +373,35 @@ class Game:
 
     def calculate_best_move(self):
 
-        try:
-            paddle_pos = [k for k,v in self.state.items() if v == 3][0]
-            ball_pos = [k for k,v in self.state.items() if v == 4][0]
-        except ValueError:
-            return  0
+        if self.layout is not None:
+            memory = self.computer.memory
+            paddle_x = memory[self.layout.paddle_x]
+            ball_x = memory[self.layout.ball_x]
+        else:
+            paddle_pos = self.state.paddle
+            ball_pos = self.state.ball
+            if paddle_pos is None or ball_pos is None:
+                return 0
+            paddle_x, ball_x = paddle_pos[0], ball_pos[0]
 
         # Crude Strategy is to ensure paddle is below ball
 
-        if paddle_pos[0] > ball_pos[0]:
+        if paddle_x > ball_x:
             return -1
-        elif paddle_pos[0] < ball_pos[0]:
+        elif paddle_x < ball_x:
             return 1
         else:
             return 0
 
     def play(self):
         print("\nLoading Game\n")
+        if self.layout is not None:
+            # One run to the end, the game state is read from memory at each input
+            self.computer.run()
+            self.score = self.computer.memory[self.layout.score]
+            print(f"Final Score: {self.score}")
+            return
+
         while self.computer.status != intcode.StatusFlag.FINISHED:
         
             # parse 3 output values           
@@ -145,12 +417,24 @@ class Game:
                 self.computer.output_value = None
                 
                 if (x, y) != (-1, 0):
-                    self.state[(x, y)] = t_id
+                    if self.state.get((x, y)) != t_id:
+                        self.state[(x, y)] = t_id
+                        self.dirty.add((x, y))
+                        if self.frame_log is not None:
+                            self.frame_log.tile(x, y, t_id)
                 else:
+                    if self.frame_log is not None and t_id != self.score:
+                        self.frame_log.score(t_id)
                     self.score=t_id
 
+        if self.frame_log is not None:
+            self.frame_log.end_frame(self.state, self.score)
+            self.frame_log.close()
+        self.render(force=True)
         print(f"Final Score: {self.score}")
-# solve()
 
-game = Game(ai=True)
-aoc.timer(game.play())
\ No newline at end of file
+if __name__ == '__main__':
+    # solve()
+
+    game = Game(ai=True)
+    aoc.timer(game.play())
\ No newline at end of file
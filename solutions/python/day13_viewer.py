@@ -0,0 +1,222 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from day13 import Board, CHAR_MAP, DiffRenderer, FrameLog, TileID
+
+"""
+Offline viewer for the arcade frame logs written by day13.Game(frame_log=...)
+
+Nothing here runs the Intcode program.  The log is scanned once to index the frames and keyframes, after which any
+frame can be reached by loading the nearest keyframe before it and applying the tile deltas in between.
+"""
+
+
+class FrameLogReader:
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            self.data = f.read()
+
+        magic, self.keyframe_every = FrameLog.HEADER.unpack_from(self.data, 0)
+        if magic != FrameLog.MAGIC:
+            raise ValueError("Not an arcade frame log: {}".format(filename))
+
+        self.start = FrameLog.HEADER.size
+        self.frame_ends = []    # Offset just past the F record of each frame
+        self.keyframes = {}     # Frame -> offset of its K record
+        self.index()
+
+    def __len__(self):
+        return len(self.frame_ends)
+
+    def records(self, offset):
+        # Yield (tag, values, next_offset) from offset to the end of the log
+        data = self.data
+        while offset < len(data):
+            tag = data[offset:offset+1]
+            if tag == b'T':
+                _, x, y, t_id = FrameLog.TILE.unpack_from(data, offset)
+                offset += FrameLog.TILE.size
+                yield tag, (x, y, t_id), offset
+            elif tag == b'S':
+                _, score = FrameLog.SCORE.unpack_from(data, offset)
+                offset += FrameLog.SCORE.size
+                yield tag, score, offset
+            elif tag == b'F':
+                _, frame = FrameLog.FRAME.unpack_from(data, offset)
+                offset += FrameLog.FRAME.size
+                yield tag, frame, offset
+            elif tag == b'K':
+                _, frame, width, height, score = FrameLog.KEYFRAME.unpack_from(data, offset)
+                start = offset + FrameLog.KEYFRAME.size
+                offset = start + width * height
+                tiles = np.frombuffer(data, dtype=np.uint8, count=width * height, offset=start).reshape(height, width)
+                yield tag, (frame, tiles, score), offset
+            else:
+                raise ValueError("Bad record tag {!r} at offset {}".format(tag, offset))
+
+    def index(self):
+        offset = self.start
+        for tag, values, next_offset in self.records(self.start):
+            if tag == b'F':
+                self.frame_ends.append(next_offset)
+            elif tag == b'K':
+                self.keyframes[values[0]] = offset
+            offset = next_offset
+
+    def seek(self, frame):
+        """
+        Return the (board, score, offset) at the end of a frame, where offset is where the next frame's records start
+        """
+        if not 0 <= frame < len(self):
+            raise IndexError("Frame {} out of range, the log has {} frames".format(frame, len(self)))
+
+        # The nearest keyframe at or before the frame, keyframes sit right after their frame's F record
+        key = frame - frame % self.keyframe_every
+        if key in self.keyframes:
+            _, (_, tiles, score), offset = next(self.records(self.keyframes[key]))
+            board = Board.from_array(tiles.astype(np.int8))
+            if key == frame:
+                return board, score, offset
+        else:
+            board, score, offset = Board(), 0, self.start
+
+        for tag, values, offset in self.records(offset):
+            if tag == b'T':
+                x, y, t_id = values
+                board[(x, y)] = t_id
+            elif tag == b'S':
+                score = values
+            elif tag == b'F' and values == frame:
+                break
+
+        # Skip the keyframe for this frame, if there is one
+        if frame in self.keyframes and self.keyframes[frame] == offset:
+            _, _, offset = next(self.records(offset))
+        return board, score, offset
+
+
+def play(filename, fps=30, start_frame=0, end_frame=None, stream=None):
+    """
+    Play a frame log in the terminal.
+
+    Arguments:
+        fps: Frames per second, None to play as fast as the terminal allows
+        start_frame, end_frame: The range of frames to show, the end is exclusive
+    """
+    log = FrameLogReader(filename)
+    end_frame = len(log) if end_frame is None else min(end_frame, len(log))
+    if start_frame >= end_frame:
+        return
+
+    board, score, offset = log.seek(start_frame)
+    renderer = DiffRenderer(CHAR_MAP, stream=stream)
+
+    # Full draw of the first frame
+    width, height = board.dim
+    dirty = {(x, y) for y in range(height) for x in range(width)}
+    renderer.draw(board, dirty, score, force=True)
+
+    frame = start_frame
+    frame_time = 1 / fps if fps else 0
+    next_frame = time.perf_counter() + frame_time
+
+    for tag, values, offset in log.records(offset):
+        if tag == b'T':
+            x, y, t_id = values
+            board[(x, y)] = t_id
+            dirty.add((x, y))
+        elif tag == b'S':
+            score = values
+        elif tag == b'F':
+            frame = values
+            if frame >= end_frame:
+                break
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_frame += frame_time
+            renderer.draw(board, dirty, score, force=True)
+
+    print(f"Frame: {frame}  Score: {score}")
+
+
+def test_frame_log():
+    # Log a scripted game, keeping the board at the end of every frame, then seek to each frame and compare
+    rng = random.Random(13)
+    board = Board()
+    expected = []
+    score = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, 'game.log')
+        log = FrameLog(filename, keyframe_every=3)
+
+        def draw(pos, t_id):
+            if board[pos] != t_id:
+                board[pos] = t_id
+                log.tile(*pos, t_id)
+
+        for x in range(12):
+            draw((x, 0), TileID.WALL)
+            draw((x, 1), TileID.BLOCK)
+            draw((x, 2), TileID.BLOCK)
+        ball, paddle = (3, 5), (4, 9)
+
+        for frame in range(20):
+            if frame:
+                # Break a block or two, move the ball and paddle, score now and then
+                for _ in range(rng.randint(0, 2)):
+                    draw((rng.randrange(12), rng.randint(1, 2)), TileID.EMPTY)
+                draw(ball, TileID.EMPTY)
+                ball = (rng.randrange(1, 11), rng.randint(3, 8))
+                draw(paddle, TileID.EMPTY)
+                paddle = (max(0, min(11, paddle[0] + rng.choice((-1, 0, 1)))), 9)
+                if rng.random() < 0.5:
+                    score += rng.randint(1, 50)
+                    log.score(score)
+            draw(ball, TileID.BALL)
+            draw(paddle, TileID.PADDLE)
+
+            log.end_frame(board, score)
+            expected.append((board.tiles.copy(), board.blocks, board.ball, board.paddle, score))
+        log.close()
+
+        reader = FrameLogReader(filename)
+        assert len(reader) == 20
+        assert sorted(reader.keyframes) == list(range(0, 20, 3))
+
+        # Every frame, so on, just before and just after each keyframe
+        for frame, (tiles, blocks, ball, paddle, score) in enumerate(expected):
+            seen, seen_score, offset = reader.seek(frame)
+            width, height = seen.dim
+            assert (seen.tiles[:height, :width] == tiles[:height, :width]).all(), frame
+            assert not tiles[height:].any() and not tiles[:, width:].any(), frame
+            assert (seen.blocks, seen.ball, seen.paddle, seen_score) == (blocks, ball, paddle, score), frame
+
+            # The offset is the start of the next frame, its first record is never this frame's keyframe
+            if frame + 1 < len(reader):
+                tag, _, _ = next(reader.records(offset))
+                assert tag != b'K', frame
+
+        try:
+            reader.seek(20)
+        except IndexError:
+            pass
+        else:
+            raise AssertionError("Expected an IndexError seeking past the end")
+
+    print("Frame log tests passed")
+
+
+if __name__ == '__main__':
+    # test_frame_log()
+
+    # python day13_viewer.py <log> [fps] [start_frame]
+    args = sys.argv[1:]
+    play(args[0], fps=float(args[1]) if len(args) > 1 else 30, start_frame=int(args[2]) if len(args) > 2 else 0)
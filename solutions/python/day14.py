@@ -1,6 +1,10 @@
 import aoc
-from collections import defaultdict
+import time
+from collections import defaultdict, deque, namedtuple
 import math
+from fractions import Fraction
+
+import numpy as np
 """
 As I understand it, we need to traverse a linked list or other similar mapping to determine the amount of ORE required to produce 1 FUEL
 
@@ -71,6 +75,217 @@ class ReactionBook:
 
 			self._reactions[output_name] = {'in': inputs, 'qty': output_qty }
 
+	def validate(self):
+		"""
+		Check the book can make FUEL, in time linear in the size of the book.
+
+		Raises ValueError for a missing FUEL reaction, an input that no reaction makes, or a cycle.  Otherwise returns
+		the chemicals in topological order, each before all of the chemicals its reaction consumes.
+		"""
+		book = self._reactions
+		if 'FUEL' not in book:
+			raise ValueError("No reaction makes FUEL")
+
+		# Kahn's algorithm, counting for each chemical how many reactions still to be placed consume it
+		consumers = dict.fromkeys(book, 0)
+		for name, reaction in book.items():
+			for input_name in reaction['in']:
+				if input_name == 'ORE':
+					continue
+				if input_name not in consumers:
+					raise ValueError("No reaction makes {}, needed for {}".format(input_name, name))
+				consumers[input_name] += 1
+
+		order = []
+		ready = deque(name for name, n in consumers.items() if n == 0)
+		while ready:
+			name = ready.popleft()
+			order.append(name)
+			for input_name in book[name]['in']:
+				if input_name != 'ORE':
+					consumers[input_name] -= 1
+					if consumers[input_name] == 0:
+						ready.append(input_name)
+
+		if len(order) != len(book):
+			placed = set(order)
+			raise ValueError("Reactions have a cycle through: {}".format([name for name in book if name not in placed][:10]))
+		return order
+
+	def compile(self):
+		return ReactionPlan(self)
+
+
+ProductionPlan = namedtuple('ProductionPlan', ('names', 'need', 'batches', 'made', 'leftover', 'ore'))
+
+
+class ReactionPlan:
+	"""
+	A ReactionBook flattened for fast evaluation.  Chemicals get integer ids in topological order, every chemical comes
+	before all of the chemicals its reaction consumes, so FUEL is near the front and ORE is last.  The inputs of
+	chemical i are in_ids[in_offsets[i]:in_offsets[i + 1]] with quantities in in_qty at the same positions.
+
+	Working in that order, everything that consumes a chemical has been run by the time it is reached, so its total
+	need is known and it can be made in one go, with a single ceil division and no leftovers to track.
+	"""
+
+	def __init__(self, reactions: ReactionBook):
+		book = reactions._reactions
+		order = reactions.validate()
+
+		self.names = order + ['ORE']
+		self.ids = {name: i for i, name in enumerate(self.names)}
+		self.ore = self.ids['ORE']
+
+		ids = self.ids
+		out_qty, in_ids, in_qty, in_offsets = [], [], [], [0]
+		self._steps = []  # The same reactions as plain lists, for the scalar pass
+		for i, name in enumerate(order):
+			reaction = book[name]
+			inputs = [(ids[input_name], qty) for input_name, qty in reaction['in'].items()]
+			out_qty.append(reaction['qty'])
+			in_ids.extend(j for j, qty in inputs)
+			in_qty.extend(qty for j, qty in inputs)
+			in_offsets.append(len(in_ids))
+			self._steps.append((i, reaction['qty'], inputs))
+		out_qty.append(0)  # ORE
+		in_offsets.append(len(in_ids))
+
+		self.out_qty = np.array(out_qty, dtype=np.int64)
+		self.in_ids = np.array(in_ids, dtype=np.int64)
+		self.in_qty = np.array(in_qty, dtype=np.int64)
+		self.in_offsets = np.array(in_offsets, dtype=np.int64)
+		self._fuel_limits = None
+
+	def __len__(self):
+		return len(self.names)
+
+	def ore_for(self, fuel: int=1) -> int:
+		# ORE needed to make fuel FUEL from nothing
+		need = [0] * len(self.names)
+		need[self.ids['FUEL']] = fuel
+		for i, qty, inputs in self._steps:
+			if need[i] > 0:
+				batches = -(-need[i] // qty)
+				for j, input_qty in inputs:
+					need[j] += batches * input_qty
+		return need[self.ore]
+
+	def plan(self, orders: dict) -> ProductionPlan:
+		"""
+		The least ORE to fill a whole order book, eg. {'FUEL': 500, 'C': 20}, at once.
+
+		All the orders go in as demand up front and are worked off in one topological pass, so every chemical is made
+		in as few batches as its combined demand allows, whatever order the book lists things in.
+
+		Returns a ProductionPlan of arrays indexed like names: the total need for each chemical, the batches of it
+		run, the amount made, and what is left over, plus the ORE used.
+		"""
+		need = [0] * len(self.names)
+		for name, qty in orders.items():
+			if name not in self.ids:
+				raise ValueError("No reaction makes {}".format(name))
+			if qty < 0:
+				raise ValueError("Cannot order {} {}".format(qty, name))
+			need[self.ids[name]] += qty
+
+		batches = [0] * len(self.names)
+		for i, qty, inputs in self._steps:
+			if need[i] > 0:
+				batches[i] = n = -(-need[i] // qty)
+				for j, input_qty in inputs:
+					need[j] += n * input_qty
+
+		need = np.array(need, dtype=np.int64)
+		batches = np.array(batches, dtype=np.int64)
+		made = batches * self.out_qty
+		made[self.ore] = need[self.ore]  # ORE is mined to order
+		return ProductionPlan(self.names, need, batches, made, made - need, int(need[self.ore]))
+
+	def _limits(self):
+		# (largest fuel ore_for_many can do in int64, ORE per FUEL with no rounding up) worked out once.  Needs for n
+		# fuel are at most n times the needs for one, so the int64 limit comes from the largest need for one fuel
+		if self._fuel_limits is None:
+			need = self.plan({'FUEL': 1}).need
+			rate = [Fraction(0)] * len(self.names)
+			rate[self.ids['FUEL']] = Fraction(1)
+			for i, qty, inputs in self._steps:
+				for j, input_qty in inputs:
+					rate[j] += rate[i] / qty * input_qty
+			self._fuel_limits = (np.iinfo(np.int64).max // int(need.max()), rate[self.ore])
+		return self._fuel_limits
+
+	def ore_for_many(self, fuel) -> np.ndarray:
+		# ore_for on an array of fuel amounts, each chemical's needs are a vector across all of them.  Amounts too big
+		# for int64 arithmetic are done in Python ints, in an object array
+		fuel = np.asarray(fuel)
+		safe_fuel, _ = self._limits()
+		dtype = np.int64 if fuel.size == 0 or fuel.max() <= safe_fuel else object
+		need = np.zeros((len(self.names),) + fuel.shape, dtype=dtype)
+		need[self.ids['FUEL']] = fuel
+		for i, qty, inputs in self._steps:
+			batches = -(-need[i] // qty)
+			for j, input_qty in inputs:
+				need[j] += batches * input_qty
+		return need[self.ore]
+
+	def max_fuel(self, ore_budget: int=10**12) -> int:
+		# The most FUEL ore_budget ORE can make.  Ore needed only grows with fuel, so gallop up to a bound and bisect
+		lo = ore_budget // self.ore_for(1)  # Leftovers only ever help, so this much fuel is always affordable
+		if lo <= 0:  # Including negative budgets, which can't make anything
+			return 0
+		hi = 2 * lo
+		while self.ore_for(hi) <= ore_budget:
+			lo, hi = hi, 2 * hi
+
+		# ore_for(lo) fits the budget, ore_for(hi) does not
+		while hi - lo > 1:
+			mid = (lo + hi) // 2
+			if self.ore_for(mid) <= ore_budget:
+				lo = mid
+			else:
+				hi = mid
+		return lo
+
+	def max_fuel_many(self, ore_budgets) -> np.ndarray:
+		"""
+		max_fuel for an array of budgets, every budget's search steps are evaluated together with ore_for_many.
+
+		Budgets whose search could go past the int64 limit of ore_for_many are searched in Python ints instead.
+		Negative budgets make no fuel, like a budget of 0.
+		"""
+		budgets = np.asarray(ore_budgets, dtype=object).astype(object)
+		budgets = np.array([max(int(budget), 0) for budget in budgets.ravel()], dtype=object).reshape(budgets.shape)
+		fuel = np.zeros(budgets.shape, dtype=object)
+
+		# No rounding up is the cheapest fuel can ever be, so budget / rate bounds the answer and the search stays
+		# under 2 * bound + 1.  The rate is an exact Fraction, so any size of budget works
+		safe_fuel, rate = self._limits()
+		bound = np.array([budget * rate.denominator // rate.numerator + 1 for budget in budgets.ravel()], dtype=object).reshape(budgets.shape)
+		small = 2 * bound + 1 <= safe_fuel
+		for mask, dtype in ((small, np.int64), (~small, object)):
+			if mask.any():
+				fuel[mask] = self._search_fuel(budgets[mask].astype(dtype))
+
+		return fuel.astype(np.int64) if fuel.size == 0 or fuel.max() <= np.iinfo(np.int64).max else fuel
+
+	def _search_fuel(self, budgets) -> np.ndarray:
+		lo = budgets // self.ore_for(1)
+		hi = 2 * lo + 1
+
+		grow = self.ore_for_many(hi) <= budgets
+		while grow.any():
+			lo = np.where(grow, hi, lo)
+			hi = np.where(grow, 2 * hi, hi)
+			grow = self.ore_for_many(hi) <= budgets
+
+		while (hi - lo > 1).any():
+			mid = (lo + hi) // 2
+			fits = self.ore_for_many(mid) <= budgets
+			lo = np.where(fits, mid, lo)
+			hi = np.where(fits, hi, mid)
+		return lo
+
 class Nanofactory:
 
 	def __init__(self, reactions: ReactionBook):
@@ -83,11 +298,13 @@ class Nanofactory:
 		# Take what's needed from the store, return what is remaining
 
 		if self.store[name] >= qty:
-			debug(f"Taking {qty} {name} from store")
+			if DEBUG:
+				debug(f"Taking {qty} {name} from store")
 			self.store[name] -= qty
 			return 0
 		else:
-			debug(f"Taking {self.store[name]} {name} from store")
+			if DEBUG:
+				debug(f"Taking {self.store[name]} {name} from store")
 			qty -= self.store[name]
 			self.store[name] = 0
 			return qty
@@ -109,7 +326,8 @@ class Nanofactory:
 			At the end, we should have the target item produced, the store filled with remainder amounts, and the amount of ore needed in production
 			
 		"""
-		debug(f"Production Request: {target_qty} of {target_name}")
+		if DEBUG:
+			debug(f"Production Request: {target_qty} of {target_name}")
 
 		need_to_produce = self.take_from_store(target_name, target_qty)
 
@@ -123,14 +341,16 @@ class Nanofactory:
 			for reaction_input, input_qty in reaction_inputs.items():
 				if reaction_input == 'ORE':
 					ore_used = batch_qty * input_qty
-					debug(f"Using {ore_used} ORE")
+					if DEBUG:
+						debug(f"Using {ore_used} ORE")
 					self.ore_used += ore_used
 					continue
 
 				self.produce(reaction_input, batch_qty * input_qty)
 
 			extra = batch_qty * reaction_qty - need_to_produce
-			debug(f"Storing remaining {extra} of {target_name}  to store")
+			if DEBUG:
+				debug(f"Storing remaining {extra} of {target_name}  to store")
 			self.store[target_name] += extra
 
 	def how_much_fuel(self, ore_amount=1e12):
@@ -150,20 +370,119 @@ class Nanofactory:
 
 		return fuel_produced
 
+def random_reactions(n_chemicals: int, fan_in=(1, 4), depth: int=10, batch=(1, 10), qty=(1, 10), seed=None) -> str:
+	"""
+	A random, valid reaction book as text, in the puzzle's format.
+
+	Arguments:
+		n_chemicals: Chemicals other than ORE and FUEL
+		fan_in: Inclusive range of the number of inputs per reaction
+		depth: Number of layers of chemicals between FUEL and ORE, at most n_chemicals
+		batch: Inclusive range of the amount each reaction makes
+		qty: Inclusive range of the amount of each input a reaction takes
+		seed: For the random number generator
+
+	Chemicals are dealt into depth layers that grow geometrically towards ORE.  FUEL is made from the first layer,
+	every other layer from the layer below it, with the odd input from any deeper layer, and the last layer from ORE, so
+	the book is acyclic by construction.  Every chemical is an input to at least one chemical in the layer above, so
+	FUEL needs all of them.  Where a layer is more than fan_in[1] times the size of the one above, that takes more
+	inputs than fan_in allows.
+	"""
+	if n_chemicals < 1:
+		raise ValueError("Need at least one chemical, got {}".format(n_chemicals))
+	depth = max(1, min(depth, n_chemicals))
+	rng = np.random.default_rng(seed)
+
+	# Layer sizes growing by a constant ratio, at least one chemical each
+	weights = (n_chemicals ** (1 / depth)) ** np.arange(depth)
+	sizes = np.maximum(1, (n_chemicals * weights / weights.sum()).astype(np.int64))
+	while sizes.sum() > n_chemicals:
+		sizes[np.argmax(sizes)] -= 1
+	sizes[-1] += n_chemicals - sizes.sum()
+	starts = np.concatenate(([0], np.cumsum(sizes)))
+
+	names = ['C{}'.format(i) for i in range(n_chemicals)] + ['ORE']
+	ore = n_chemicals
+
+	def draw(lo, hi, count, exclude):
+		# count distinct ids from range(lo, hi) not in exclude, or as many as there are
+		count = min(count, hi - lo - len(exclude))
+		if count <= 0:
+			return []
+		picked = rng.choice(hi - lo, size=min(hi - lo, count + len(exclude)), replace=False) + lo
+		return [int(j) for j in picked if j not in exclude][:count]
+
+	# Deal each layer out over the layer above it, round robin in a random order, so each has a consumer
+	forced = [[] for _ in range(n_chemicals + 1)]  # Index -1 is FUEL
+	forced[-1] = list(range(starts[0], starts[1]))
+	for k in range(depth - 1):
+		consumers = rng.permutation(np.arange(starts[k], starts[k + 1]))
+		for n, j in enumerate(range(starts[k + 1], starts[k + 2])):
+			forced[consumers[n % len(consumers)]].append(j)
+
+	lines = []
+	for i in range(-1, n_chemicals):
+		k = int(np.searchsorted(starts, i, side='right')) if i >= 0 else 0  # The layer i's inputs come from
+		if k >= depth:
+			inputs = [ore]
+		else:
+			inputs = forced[i]
+			extra = int(rng.integers(fan_in[0], fan_in[1] + 1)) - len(inputs)
+			if extra > 0:
+				# Mostly the next layer, sometimes further down
+				deeper = int((rng.random(extra) < 0.2).sum())
+				chosen = set(inputs)
+				inputs = inputs + draw(starts[k], starts[k + 1], extra - deeper, chosen)
+				inputs = inputs + draw(starts[k + 1], n_chemicals + 1, deeper, set(inputs))
+		amounts = rng.integers(qty[0], qty[1] + 1, len(inputs))
+		output = names[i] if i >= 0 else 'FUEL'
+		made = int(rng.integers(batch[0], batch[1] + 1)) if i >= 0 else 1
+		lines.append('{} => {} {}'.format(', '.join('{} {}'.format(a, names[j]) for a, j in zip(amounts, inputs)), made, output))
+	return '\n'.join(lines)
+
+def benchmark(sizes=(10**3, 10**4, 10**5), fan_in=(1, 4), depth: int=10, seed=0):
+	# Parse, validate, ore for one fuel and max fuel times on random reaction books of each size
+	print("{:>10}{:>12}{:>12}{:>12}{:>12}{:>12}".format('chemicals', 'parse ms', 'compile ms', 'ore_for ms', 'max_fuel ms', 'produce ms'))
+	for n in sizes:
+		text = random_reactions(n, fan_in=fan_in, depth=depth, seed=seed)
+		timings = []
+
+		start_time = time.perf_counter()
+		reactions = ReactionBook(text)
+		timings.append(time.perf_counter() - start_time)
+
+		start_time = time.perf_counter()
+		plan = reactions.compile()
+		timings.append(time.perf_counter() - start_time)
+
+		start_time = time.perf_counter()
+		ore = plan.ore_for(1)
+		timings.append(time.perf_counter() - start_time)
+
+		start_time = time.perf_counter()
+		plan.max_fuel(1000 * ore)
+		timings.append(time.perf_counter() - start_time)
+
+		# The recursive factory, only where it finishes in reasonable time
+		if n <= 10**3:
+			start_time = time.perf_counter()
+			factory = Nanofactory(reactions)
+			factory.produce('FUEL', 1)
+			timings.append(time.perf_counter() - start_time)
+			assert factory.ore_used == ore, "Factory and plan disagree: {} != {}".format(factory.ore_used, ore)
+		print("{:>10}".format(n) + ''.join("{:>12.1f}".format(t * 1000) for t in timings))
+
 def part1():
 
 	with open('input/14.txt') as f:
 		input_str = f.read().strip()
 
 	reactions = ReactionBook(input_str)
-	nanofactory = Nanofactory(reactions)
+	plan = reactions.compile()
 
-	nanofactory.produce('FUEL', 1)
+	print(f"1 Fuel requires: {plan.ore_for(1)} ore")
 
-	print(f"1 Fuel requires: {nanofactory.ore_used} ore")
-
-	nanofactory = Nanofactory(reactions)
-	fuel_amount = nanofactory.how_much_fuel()
+	fuel_amount = plan.max_fuel(10**12)
 	print(f"You can produce {fuel_amount} fuel")
 
 def test1():
@@ -197,6 +516,9 @@ def test1():
 	actual_output = factory.ore_used
 	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
 
+	actual_output = reactions.compile().ore_for(1)
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
 	print("Tests 1 passed")
 
 # test1()
@@ -222,10 +544,22 @@ def test2():
 	actual_output = factory.ore_used
 	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
 
+	actual_output = reactions.compile().ore_for(1)
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
 	factory = Nanofactory(reactions)
 	expected_output = 82892753
 	actual_output = factory.how_much_fuel()
 	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
+	plan = reactions.compile()
+	actual_output = plan.max_fuel(10**12)
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
+	budgets = np.array([0, plan.ore_for(1) - 1, plan.ore_for(1), 10**9, 10**12])
+	expected_output = [plan.max_fuel(int(budget)) for budget in budgets]
+	actual_output = plan.max_fuel_many(budgets).tolist()
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
 	print("Tests 2 passed")
 
 def test3():
@@ -252,11 +586,23 @@ def test3():
 	actual_output = factory.ore_used
 	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
 
+	actual_output = reactions.compile().ore_for(1)
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
 	factory = Nanofactory(reactions)
 	expected_output = 5586022 
 	actual_output = factory.how_much_fuel()
 	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
 
+	plan = reactions.compile()
+	actual_output = plan.max_fuel(10**12)
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
+	budgets = np.array([0, plan.ore_for(1) - 1, plan.ore_for(1), 10**9, 10**12])
+	expected_output = [plan.max_fuel(int(budget)) for budget in budgets]
+	actual_output = plan.max_fuel_many(budgets).tolist()
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
 	print("Tests 3 passed")
 
 def test4():
@@ -288,21 +634,100 @@ def test4():
 	actual_output = factory.ore_used
 	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
 
+	actual_output = reactions.compile().ore_for(1)
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
 	factory = Nanofactory(reactions)
 	expected_output = 460664  
 	actual_output = factory.how_much_fuel()
 	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
 
+	plan = reactions.compile()
+	actual_output = plan.max_fuel(10**12)
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
+	budgets = np.array([0, plan.ore_for(1) - 1, plan.ore_for(1), 10**9, 10**12])
+	expected_output = [plan.max_fuel(int(budget)) for budget in budgets]
+	actual_output = plan.max_fuel_many(budgets).tolist()
+	assert actual_output == expected_output, f"Expected: {expected_output}. Got: {actual_output}"
+
 	print("Tests 4 passed")
 
+def test_validate():
+	for input_str in ["1 ORE => 1 A", "1 B => 1 FUEL", "1 A => 1 FUEL\n1 B => 1 A\n1 A => 1 B"]:
+		try:
+			ReactionBook(input_str).validate()
+		except ValueError:
+			pass
+		else:
+			assert False, f"Invalid reactions passed: {input_str}"
+
+	for seed in range(5):
+		reactions = ReactionBook(random_reactions(200, depth=5, seed=seed))
+		assert len(reactions.validate()) == len(reactions)
+		# Everything is needed for FUEL
+		assert (reactions.compile().plan({'FUEL': 1}).need > 0).all()
+		factory = Nanofactory(reactions)
+		factory.produce('FUEL', 1)
+		assert reactions.compile().ore_for(1) == factory.ore_used
+
+	# Fewer chemicals than layers, and inputs that are never repeated
+	for n in (1, 2, 5):
+		assert len(ReactionBook(random_reactions(n, depth=10, seed=0)).validate()) == n + 1
+	for line in random_reactions(1000, fan_in=(3, 6), seed=1).split('\n'):
+		inputs = [name.split(' ')[1] for name in line.split(' => ')[0].split(', ')]
+		assert len(set(inputs)) == len(inputs), line
+
+	print("Validation tests passed")
+
+def test_plan():
+	reactions = ReactionBook('''\
+10 ORE => 10 A
+1 ORE => 1 B
+7 A, 1 B => 1 C
+7 A, 1 C => 1 D
+7 A, 1 D => 1 E
+7 A, 1 E => 1 FUEL
+''')
+	plan = reactions.compile()
+
+	production = plan.plan({'FUEL': 1})
+	assert production.ore == 31
+	assert production.leftover[plan.ids['A']] == 2
+
+	# Ordering the leftover A alongside the fuel costs nothing extra, however the orders are listed
+	assert plan.plan({'FUEL': 1, 'A': 2}).ore == 31
+	assert plan.plan({'A': 2, 'FUEL': 1}).ore == 31
+	production = plan.plan({'FUEL': 3, 'D': 2, 'ORE': 5})
+	# 3 E and 5 D, so 5 C and 5 B, and 21 + 21 + 35 + 35 = 112 A in 12 batches: 120 + 5 + 5 ORE
+	assert production.ore == 130, production.ore
+
+	assert all(production.made - production.need == production.leftover)
+	assert production.leftover.min() >= 0
+
+	# Budgets past what int64 needs can hold are searched in Python ints rather than overflowing
+	budgets = [10**12, 9 * 10**18, 10**30]
+	assert plan.max_fuel_many(budgets).tolist() == [plan.max_fuel(budget) for budget in budgets]
+
+	# Negative budgets make nothing, and budgets too big for a float still have an exact bound
+	budgets = [-5, 0, 30, 31, 10**400]
+	assert plan.max_fuel_many(budgets).tolist() == [plan.max_fuel(budget) for budget in budgets]
+	assert plan.max_fuel_many(budgets)[:4].tolist() == [0, 0, 0, 1]
+	assert plan.ore_for(plan.max_fuel(10**400)) <= 10**400 < plan.ore_for(plan.max_fuel(10**400) + 1)
+
+	print("Plan tests passed")
+
 def run_tests():
 	test1()
 	test2()
 	test3()
 	test4()
+	test_validate()
+	test_plan()
 
-# run_tests()
+if __name__ == '__main__':
+	# run_tests()
 
-part1()  # 1037742
+	part1()  # 1037742
 
 
@@ -1,7 +1,13 @@
 import os
+import random
+import tempfile
+import time
+from array import array
 from collections import defaultdict
 from itertools import chain
 
+import numpy as np
+
 in_file = os.path.join(os.getcwd(), 'input', '06.txt')
 
 assert os.path.exists(in_file), "No file found: {}".format(in_file)
@@ -104,18 +110,417 @@ def find_common_ancestor(orbits, nodeA, nodeB):
 	return common, dist
 
 
+class OrbitTree:
+	"""
+	The orbit map as a tree of integer ids.  Body names are interned to ids in the order they are first seen, and each
+	body's parent id is held in a flat vector (-1 for a root), so a map with millions of orbits is a few arrays rather
+	than a dict per body.
+
+	Depths are worked out in one iterative pass over the parent vector, no recursion, so long chains are fine.
+	"""
+
+	def __init__(self, names, parent):
+		self.names = names
+		self.ids = {name: i for i, name in enumerate(names)}
+		self.parent = np.asarray(parent, dtype=np.int64)
+		self._order = None
+		self._depth = None
+		self._lift = None
+
+	@classmethod
+	def from_edges(cls, edges):
+		# Build from an iterable of (parent, child) name pairs
+		ids = {}
+		names = []
+		parent = array('q')
+
+		def intern(name):
+			i = ids.get(name)
+			if i is None:
+				i = ids[name] = len(names)
+				names.append(name)
+				parent.append(-1)
+			return i
+
+		for p, c in edges:
+			p, c = intern(p), intern(c)
+			if parent[c] != -1 and parent[c] != p:
+				raise ValueError("{} orbits both {} and {}".format(names[c], names[parent[c]], names[p]))
+			parent[c] = p
+
+		return cls(names, np.frombuffer(parent, dtype=np.int64))
+
+	@classmethod
+	def from_file(cls, in_f):
+		with open(in_f) as f:
+			return cls.from_edges(parse_orbit(line) for line in f if line.strip())
+
+	def __len__(self):
+		return len(self.names)
+
+	def __contains__(self, name):
+		return name in self.ids
+
+	def id(self, name):
+		return self.ids[name]
+
+	def children(self):
+		# CSR style child lists: the children of i are child_ids[offsets[i]:offsets[i + 1]]
+		has_parent = np.flatnonzero(self.parent >= 0)
+		child_ids = has_parent[np.argsort(self.parent[has_parent], kind='stable')]
+		counts = np.bincount(self.parent[has_parent], minlength=len(self))
+		offsets = np.concatenate(([0], np.cumsum(counts)))
+		return child_ids, offsets
+
+	def _walk(self):
+		# Depths by pointer jumping: every body adds on the depth of the ancestor it points at, then points at that
+		# ancestor's ancestor, so the whole map is done in log2(max depth) vectorised passes, however long the chains
+		anc = self.parent.copy()
+		depth = (anc >= 0).astype(np.int64)
+		live = np.flatnonzero(anc >= 0)
+		for _ in range(len(self).bit_length() + 1):
+			up = anc[live] >= 0
+			live = live[up]
+			if not len(live):
+				break
+			a = anc[live]
+			depth[live] += depth[a]
+			anc[live] = anc[a]
+		else:
+			raise ValueError("Orbit map has a cycle, {} bodies never reach a root".format(len(live)))
+		# Sorted by depth every parent comes before any of its children
+		self._order, self._depth = np.argsort(depth, kind='stable'), depth
+
+	@property
+	def order(self):
+		# The ids ordered by depth, parents before children
+		if self._order is None:
+			self._walk()
+		return self._order
+
+	@property
+	def depth(self):
+		# Number of direct and indirect orbits of each body, ie. its distance from its root
+		if self._depth is None:
+			self._walk()
+		return self._depth
+
+	def total_orbits(self):
+		# All the direct and indirect orbits in the map
+		return int(self.depth.sum())
+
+	@property
+	def lift(self):
+		# Binary lifting table, lift[k, i] is the ancestor 2**k levels above i, a root is its own ancestor
+		if self._lift is None:
+			n_levels = max(1, int(self.depth.max()).bit_length())
+			lift = np.empty((n_levels, len(self)), dtype=np.int64)
+			lift[0] = np.where(self.parent >= 0, self.parent, np.arange(len(self)))
+			for k in range(1, n_levels):
+				lift[k] = lift[k - 1][lift[k - 1]]
+			self._lift = lift
+		return self._lift
+
+	def ancestors(self, ids, steps):
+		# The ancestor steps levels above each of ids, stopping at the root
+		ids = np.array(ids, dtype=np.int64)
+		steps = np.asarray(steps, dtype=np.int64)
+		for k, level in enumerate(self.lift):
+			jump = (steps >> k) & 1 == 1
+			ids[jump] = level[ids[jump]]
+		return ids
+
+	def common_ancestors(self, a, b):
+		"""
+		Lowest common ancestor of each pair of ids a[i], b[i], or -1 where they are in different trees.  Each pair
+		costs O(log depth), the pairs are all done together.
+		"""
+		a = np.atleast_1d(np.asarray(a, dtype=np.int64))
+		b = np.atleast_1d(np.asarray(b, dtype=np.int64))
+		depth = self.depth
+
+		# Lift the deeper of each pair up to the level of the other
+		diff = depth[a] - depth[b]
+		a = self.ancestors(a, diff.clip(0))
+		b = self.ancestors(b, (-diff).clip(0))
+
+		# Then lift both as far as they can go without meeting, from the largest jump down
+		for level in self.lift[::-1]:
+			apart = level[a] != level[b]
+			a[apart] = level[a[apart]]
+			b[apart] = level[b[apart]]
+
+		met = a == b
+		common = np.where(met, a, self.parent[a])
+		common[~met & (self.parent[a] != self.parent[b])] = -1
+		return common
+
+	def transfer_distances(self, a, b):
+		"""
+		Orbital transfers needed to get from the body a[i] orbits to the body b[i] orbits, for arrays of id pairs.
+		-1 where there is no route.
+		"""
+		a = self.parent[np.atleast_1d(np.asarray(a, dtype=np.int64))]
+		b = self.parent[np.atleast_1d(np.asarray(b, dtype=np.int64))]
+		orbiting = (a >= 0) & (b >= 0)
+		a, b = np.where(orbiting, a, 0), np.where(orbiting, b, 0)
+		common = self.common_ancestors(a, b)
+		depth = self.depth
+		dist = depth[a] + depth[b] - 2 * depth[common]
+		dist[(common < 0) | ~orbiting] = -1
+		return dist
+
+	def common_ancestor(self, nameA, nameB):
+		common = self.common_ancestors(self.id(nameA), self.id(nameB))[0]
+		return self.names[common] if common >= 0 else None
+
+	def transfer_distance(self, nameA, nameB):
+		return int(self.transfer_distances(self.id(nameA), self.id(nameB))[0])
+
+
+class OrbitGraph:
+	"""
+	An orbit map that can be edited in place.  Only parent links and subtree sizes are stored, so the total of direct
+	and indirect orbits can be kept up to date with one walk to the root per edit:
+
+		- Hanging a subtree of s bodies under a body at depth d adds s * (d + 1) orbits
+		- Every ancestor of the changed body gains or loses s from its subtree size
+	"""
+
+	def __init__(self, edges=()):
+		self.ids = {}
+		self.names = []
+		self.parent = []
+		self.size = []  # Bodies in the subtree rooted at each body, itself included
+		self.total = 0
+		for p, c in edges:
+			self.add_orbit(p, c)
+
+	@classmethod
+	def from_file(cls, in_f):
+		with open(in_f) as f:
+			return cls(parse_orbit(line) for line in f if line.strip())
+
+	def _intern(self, name):
+		i = self.ids.get(name)
+		if i is None:
+			i = self.ids[name] = len(self.names)
+			self.names.append(name)
+			self.parent.append(-1)
+			self.size.append(1)
+		return i
+
+	def _path(self, i):
+		# i and its ancestors, up to the root
+		parent = self.parent
+		while i >= 0:
+			yield i
+			i = parent[i]
+
+	def total_orbits(self):
+		return self.total
+
+	def depth(self, name):
+		return sum(1 for _ in self._path(self.ids[name])) - 1
+
+	def subtree_size(self, name):
+		return self.size[self.ids[name]]
+
+	def orbits(self, name):
+		# The body name directly orbits, or None
+		p = self.parent[self.ids[name]]
+		return self.names[p] if p >= 0 else None
+
+	def add_orbit(self, parent, child):
+		# child, and everything orbiting it, starts orbiting parent
+		p, c = self._intern(parent), self._intern(child)
+		if self.parent[c] >= 0:
+			raise ValueError("{} already orbits {}".format(child, self.names[self.parent[c]]))
+
+		path = list(self._path(p))
+		if c in path:
+			raise ValueError("{} orbiting {} would make a cycle".format(child, parent))
+
+		s = self.size[c]
+		size = self.size
+		for a in path:
+			size[a] += s
+		self.parent[c] = p
+		self.total += s * len(path)
+
+	def remove_orbit(self, parent, child):
+		# child stops orbiting parent and becomes the root of its own map, its satellites come with it
+		c = self.ids[child]
+		p = self.parent[c]
+		if p < 0 or self.names[p] != parent:
+			raise ValueError("{} does not orbit {}".format(child, parent))
+
+		s = self.size[c]
+		depth = 0
+		size = self.size
+		for a in self._path(p):
+			size[a] -= s
+			depth += 1
+		self.parent[c] = -1
+		self.total -= s * depth
+
+	def reparent(self, child, parent):
+		# Move child, and its satellites, to orbit parent instead
+		c = self.ids[child]
+		old = self.parent[c]
+		if old >= 0:
+			self.remove_orbit(self.names[old], child)
+		try:
+			self.add_orbit(parent, child)
+		except ValueError:
+			if old >= 0:
+				self.add_orbit(self.names[old], child)
+			raise
+
+	def apply(self, op, parent, child):
+		# One entry of an edge log, op is one of '+' (add), '-' (remove) or '~' (reparent)
+		if op == '+':
+			self.add_orbit(parent, child)
+		elif op == '-':
+			self.remove_orbit(parent, child)
+		elif op == '~':
+			self.reparent(child, parent)
+		else:
+			raise ValueError("Unknown edge log op: {}".format(op))
+
+	def to_tree(self):
+		return OrbitTree(list(self.names), self.parent)
+
+
+def random_edge_log(n_bodies, n_updates, seed=None):
+	# A map of n_bodies built up one orbit at a time, followed by n_updates random moves and removals
+	rng = random.Random(seed)
+	log = [('+', 'B{}'.format(rng.randrange(i)), 'B{}'.format(i)) for i in range(1, n_bodies)]
+	parent = {i: int(p[1:]) for op, p, c in log for i in [int(c[1:])]}
+	for _ in range(n_updates):
+		c = rng.randrange(1, n_bodies)
+		if c in parent and rng.random() < 0.1:
+			log.append(('-', 'B{}'.format(parent.pop(c)), 'B{}'.format(c)))
+			continue
+		# Only move onto a body that was added before c, so the map can never grow a cycle
+		p = rng.randrange(c)
+		parent[c] = p
+		log.append(('~', 'B{}'.format(p), 'B{}'.format(c)))
+	return log
+
+def benchmark(n_bodies=200000, n_updates=200000, baseline_bodies=5000, seed=0):
+	# Stream an edge log through an OrbitGraph, against rebuilding after every update: an OrbitTree from the graph, and
+	# the original parse_orbits_dir and iter_orbits on a smaller map
+	log = random_edge_log(n_bodies, n_updates, seed)
+
+	start_time = time.perf_counter()
+	graph = OrbitGraph()
+	for op, p, c in log[:n_bodies - 1]:
+		graph.apply(op, p, c)
+	build = time.perf_counter() - start_time
+
+	start_time = time.perf_counter()
+	for op, p, c in log[n_bodies - 1:]:
+		graph.apply(op, p, c)
+	update = time.perf_counter() - start_time
+	per_update = update / max(1, n_updates)
+
+	start_time = time.perf_counter()
+	total = graph.to_tree().total_orbits()
+	rebuild = time.perf_counter() - start_time
+	assert total == graph.total_orbits()
+
+	# The original dict of dicts and recursive walk, written out and read back as the puzzle input would be
+	small = OrbitGraph((p, c) for op, p, c in log[:baseline_bodies - 1])
+	with tempfile.TemporaryDirectory() as tmp:
+		in_f = os.path.join(tmp, 'orbits.txt')
+		with open(in_f, 'w') as f:
+			f.writelines('{}){}\n'.format(p, c) for op, p, c in log[:baseline_bodies - 1])
+
+		start_time = time.perf_counter()
+		orbits = parse_orbits_dir(in_f)
+		baseline_total = sum(1 for _ in iter_orbits(orbits))
+		baseline = time.perf_counter() - start_time
+	assert baseline_total == small.total_orbits()
+
+	print("{} bodies, {} updates, {} orbits".format(n_bodies, n_updates, graph.total_orbits()))
+	print("Build    {:>10.1f} ms".format(build * 1000))
+	print("Updates  {:>10.1f} ms {:>10.1f} us/update".format(update * 1000, per_update * 1e6))
+	print("Rebuild  {:>10.1f} ms per update, {:.0f}x the incremental update".format(rebuild * 1000, rebuild / max(1e-9, per_update)))
+	print("Baseline {:>10.1f} ms per update on {} bodies, parse_orbits_dir and iter_orbits, {:.0f}x the incremental update".format(
+		baseline * 1000, baseline_bodies, baseline / max(1e-9, per_update)))
+
+
+def run_tests():
+	tree = OrbitTree.from_file('input/06_test.txt')
+	assert tree.total_orbits() == 42
+	assert tree.depth[tree.id('D')] == 3
+	assert tree.depth[tree.id('L')] == 7
+
+	# A chain far deeper than the recursion limit
+	chain = OrbitTree.from_edges(('B{}'.format(i), 'B{}'.format(i + 1)) for i in range(100000))
+	assert chain.total_orbits() == 100000 * 100001 // 2
+
+	try:
+		OrbitTree.from_edges([('A', 'B'), ('B', 'A')]).depth
+	except ValueError:
+		pass
+	else:
+		assert False, "Cycle not detected"
+
+	tree = OrbitTree.from_file('input/06_test_2.txt')
+	assert tree.common_ancestor('YOU', 'SAN') == 'D'
+	assert tree.transfer_distance('YOU', 'SAN') == 4
+
+	# Batches agree with walking the ancestor lists
+	orbits = parse_orbits_dir('input/06_test_2.txt')
+	pairs = [(a, b) for a in tree.names for b in tree.names if tree.parent[tree.id(a)] >= 0 and tree.parent[tree.id(b)] >= 0]
+	dist = tree.transfer_distances([tree.id(a) for a, b in pairs], [tree.id(b) for a, b in pairs])
+	for (a, b), d in zip(pairs, dist):
+		if a != b:
+			assert find_common_ancestor(orbits, a, b)[1] == d, (a, b)
+
+	assert chain.transfer_distance('B1', 'B99999') == 99998
+
+	# Incremental updates keep the same count as building the map from scratch
+	graph = OrbitGraph.from_file('input/06_test_2.txt')
+	assert graph.total_orbits() == OrbitTree.from_file('input/06_test_2.txt').total_orbits()
+	assert graph.subtree_size('E') == 6
+	graph.reparent('J', 'COM')
+	assert graph.subtree_size('E') == 2 and graph.depth('YOU') == 3
+	assert graph.total_orbits() == graph.to_tree().total_orbits()
+	graph.remove_orbit('B', 'C')
+	assert graph.total_orbits() == graph.to_tree().total_orbits()
+	try:
+		graph.reparent('C', 'SAN')
+	except ValueError:
+		assert graph.orbits('C') is None
+	else:
+		assert False, "Cycle not detected"
+
+	graph = OrbitGraph()
+	for i, (op, p, c) in enumerate(random_edge_log(300, 300, seed=1)):
+		graph.apply(op, p, c)
+		if i % 50 == 0:
+			assert graph.total_orbits() == graph.to_tree().total_orbits()
+	assert graph.total_orbits() == graph.to_tree().total_orbits()
+
+	print("Tests OK!")
+
 
 def part1():
 	print()
 	print("Part 1")
-	orbits = parse_orbits_dir('input/six.txt')
-	print(len(list(iter_orbits(orbits))), " orbits")
+	tree = OrbitTree.from_file(in_file)
+	print(tree.total_orbits(), " orbits")
 
 def part2():
 	#print(list(iter_parents(orbits, 'YOU')))
 	#print(list(iter_parents(orbits, 'SAN')))
-	orbits = parse_orbits_dir('input/six.txt')
-	print(find_common_ancestor(orbits,  'YOU', 'SAN'))
+	tree = OrbitTree.from_file(in_file)
+	print((tree.common_ancestor('YOU', 'SAN'), tree.transfer_distance('YOU', 'SAN')))
 
-part1()  # 162439
-part2()  # ('HYC', 367)
\ No newline at end of file
+if __name__ == '__main__':
+	# run_tests()
+	part1()  # 162439
+	part2()  # ('HYC', 367)
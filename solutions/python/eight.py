@@ -1,5 +1,9 @@
 import os
 from typing import List
+
+import numpy as np
+
+from aoc.image import write_image
 in_file = os.path.join(os.getcwd(), 'input', '08.txt')
 
 
@@ -48,6 +52,11 @@ def render_row(row):
 			rendered.append(' ')
 	print("".join(rendered))
 
+def save_image(image, filename, scale=1):
+	# White pixels (1) are white, black and transparent are black.  PBM ink is black, so it gets the opposite
+	white = np.array(image) == 1
+	write_image(filename, ~white if filename.lower().endswith('.pbm') else white, scale=scale)
+
 def test_parsing():
 
 	layers = parse_layers([1,2,3,4,5,6,7,8,9,0,1,2], 3, 2)
@@ -100,5 +109,7 @@ def part2():
 	for row in final_image:
 		render_row(row)
 
+	# save_image(final_image, 'bios_password.png', scale=8)
+
 part1()  # 1620
 part2()  # BCYEF
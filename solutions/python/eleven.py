@@ -1,6 +1,8 @@
 from enum import Enum
+import time
 from intcode import IntCodeComputer, StatusFlag
-from collections import defaultdict
+from aoc.grid import Grid
+from aoc.image import write_image
 
 class RobotDirection(Enum):
 
@@ -10,6 +12,12 @@ class RobotDirection(Enum):
 	RIGHT = '>'
 
 
+# Headings clockwise from UP, as integers for the fast path.  Turning left is -1, turning right is +1
+HEADINGS = (RobotDirection.UP, RobotDirection.RIGHT, RobotDirection.DOWN, RobotDirection.LEFT)
+DX = (0, 1, 0, -1)
+DY = (1, 0, -1, 0)
+
+
 class HullPaintingRobot:
 
 	def __init__(self, program=None):
@@ -17,7 +25,8 @@ class HullPaintingRobot:
 
 		self.current_loc = (0, 0)  						# The current location of the robot
 		self.current_direction = RobotDirection.UP  	# This current direction robot is facing
-		self.state =  defaultdict(bool) 				# Dict of painted indices and current color.  [0:black, 1: white] Default is black 
+		self.state = Grid(dtype=bool, fill=False)		# Grid of the current colors.  [0:black, 1: white] Default is black 
+		self.painted = Grid(dtype=bool, fill=False)		# Grid of every panel painted at least once
 		self.computer = IntCodeComputer(program, input_user=self.iter_current(), pause_on_output=True)
 
 		# This is the map of directions to move to when provided the direction input  ie. new_direction = self.direction_map[self.current_direction][turn_cmd]
@@ -42,20 +51,14 @@ class HullPaintingRobot:
 		
 	def find_bounds(self, min_size=3):
 
-		# Find the most extreme x and y values
+		# The most extreme x and y values, the grid keeps track of these as it is painted
 		x_bounds = [ -1 * min_size, min_size ]
 		y_bounds = [ -1 * min_size, min_size ]
 
-		for x, y in self.state:
-			if x > x_bounds[1]:
-				x_bounds[1] = x
-			elif x < x_bounds[0]:
-				x_bounds[0] = x
-
-			if y > y_bounds[1]:
-				y_bounds[1] = y
-			elif y < y_bounds[0]:
-				y_bounds[0] = y
+		if self.state.bounds is not None:
+			(min_x, max_x), (min_y, max_y) = self.state.bounds
+			x_bounds = [min(x_bounds[0], min_x), max(x_bounds[1], max_x)]
+			y_bounds = [min(y_bounds[0], min_y), max(y_bounds[1], max_y)]
 		return x_bounds, y_bounds
 
 	def print_state(self, bounds=None, size=None):
@@ -63,12 +66,9 @@ class HullPaintingRobot:
 		size = size or 6
 
 		x_bounds, y_bounds = self.find_bounds(min_size=6)
-		print_state = [['.' for i in range(x_bounds[0], x_bounds[1]+1)] for i in range(y_bounds[0], y_bounds[1]+1)]
 
-		# Change all white painted squares
-		for x, y in self.state:
-			if self.state[(x,y)]:
-				print_state[y-y_bounds[0]][x-x_bounds[0]] = '#' 
+		# White painted squares are '#'
+		print_state = self.state.char_array('.#', x_bounds, y_bounds)
 
 		# Print your current position and 
 		print_state[self.current_loc[1]-y_bounds[0]][self.current_loc[0]-x_bounds[0]] = self.current_direction.value
@@ -78,6 +78,14 @@ class HullPaintingRobot:
 			print("".join(row))
 
 
+	def save_image(self, filename, scale=1):
+		# Write the hull to a .pbm, .pgm or .png, white panels white, with the largest y at the top
+		x_bounds, y_bounds = self.find_bounds(min_size=0)
+		hull = self.state.window(x_bounds, y_bounds)[::-1]
+		if filename.lower().endswith('.pbm'):
+			hull = ~hull  # PBM ink is black
+		write_image(filename, hull, scale=scale)
+
 	def iter_current(self):
 
 		# This should output an iterable compatible with the intcode computer input_vals param
@@ -88,6 +96,7 @@ class HullPaintingRobot:
 
 	def paint_current_location(self, paint_color):
 		self.state[self.current_loc] = bool(paint_color)
+		self.painted[self.current_loc] = True
 
 	def run(self):
 
@@ -97,7 +106,6 @@ class HullPaintingRobot:
 		assert self.computer.status == StatusFlag.READY, "Intcode computer is not ready to run"
 		counter = 0
 		while self.computer.status != StatusFlag.FINISHED:
-			counter += 1
 			# print("DEBUG: |{}| Current Location: {}.  Current State: {}".format(counter, self.current_loc, int(self.state[self.current_loc])))
 			# Get two output values at a time
 			
@@ -115,8 +123,45 @@ class HullPaintingRobot:
 			self.paint_current_location(paint_color)
 
 			self.move(new_direction)		
+			counter += 1
+
+		print("Done")
+		return counter
+
+	def run_fast(self):
 
+		# The same robot as an integer state machine.  The computer calls back with each (paint_color, turn) pair
+		# and asks for the camera reading directly, so it runs to the end without pausing once.
+
+		assert self.computer.status == StatusFlag.READY, "Intcode computer is not ready to run"
+
+		x, y = self.current_loc
+		heading = HEADINGS.index(self.current_direction)
+		state = self.state
+		painted = self.painted
+		steps = 0
+
+		def camera():
+			return state[(x, y)]
+
+		def paint_and_move(paint_color, turn):
+			nonlocal x, y, heading, steps
+			state[(x, y)] = paint_color
+			painted[(x, y)] = True
+			heading = (heading + (1 if turn else -1)) % 4
+			x += DX[heading]
+			y += DY[heading]
+			steps += 1
+
+		self.computer.on_input = camera
+		self.computer.on_output = paint_and_move
+		self.computer.output_group = 2
+		self.computer.run()
+
+		self.current_loc = (x, y)
+		self.current_direction = HEADINGS[heading]
 		print("Done")
+		return steps
 
 def read_program():
 	with open('input/11.txt') as f:
@@ -128,8 +173,8 @@ def part1():
 	program = read_program()
 	robot = HullPaintingRobot(program)
 	print("Running")
-	robot.run()
-	print(len(robot.state))
+	robot.run_fast()
+	print(robot.painted.count(True))
 	robot.print_state()
 	print("Finished")
 
@@ -139,10 +184,24 @@ def part2():
 	robot = HullPaintingRobot(program)
 	robot.state[robot.current_loc] = True   # Set the current location white
 	print("Running")
-	robot.run()
+	robot.run_fast()
 	robot.print_state()
+	# robot.save_image('hull.png', scale=8)
 	print("Finished")
 
+def benchmark():
+	# Steps per second of the generator driven robot against the callback driven one
+	program = read_program()
+	results = []
+	for name in ('run', 'run_fast'):
+		robot = HullPaintingRobot(program)
+		start_time = time.perf_counter()
+		steps = getattr(robot, name)()
+		elapsed = time.perf_counter() - start_time
+		results.append(robot.painted.count(True))
+		print("{:<10}{:>8} steps {:>10.1f} ms {:>10.0f} steps/s".format(name, steps, elapsed * 1000, steps / elapsed))
+	assert results[0] == results[1], "Robots disagree: {}".format(results)
+
 # part1() # 1885
 part2()  # BFEAGHAF
 
@@ -201,7 +201,8 @@ def go():
 
     run_program(mem)
 
-go()
+if __name__ == '__main__':
+    go()
 
 # part 1: provide input of 1: 11049715
 # part 2: provide input of 5: 2140710
@@ -1,5 +1,18 @@
 from typing import List
+import collections.abc
+import itertools
 from enum import Enum
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+
+import numpy as np
 
 class DebugFlag(Enum):
     OFF = 0
@@ -28,6 +41,9 @@ class MemoryAddressError(Exception):
 class ProgramFinished(Exception):
     pass
 
+class ReplayError(Exception):
+    pass
+
 
 
 class Memory(list):
@@ -57,9 +73,68 @@ class Memory(list):
             self[-1] = val
 
 
+class ArrayMemory:
+
+    # The same expanding memory, but held in a NumPy int64 array with spare capacity so it can be viewed in place.
+    # Values must fit in an int64.
+
+    def __init__(self, values=()):
+        self.data = np.array(values, dtype=np.int64)
+        self.size = len(self.data)
+
+    def _grow(self, idx):
+        if idx >= len(self.data):
+            data = np.zeros(max(idx + 1, 2 * len(self.data)), dtype=np.int64)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.size = idx + 1
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self.data[:self.size][idx].tolist()
+        if idx < 0:
+            idx += self.size
+        if idx >= self.size:
+            self._grow(idx)
+            return 0
+        return int(self.data[idx])
+
+    def __setitem__(self, idx, val):
+        if idx < 0:
+            idx += self.size
+        if idx >= self.size:
+            self._grow(idx)
+        self.data[idx] = val
+
+    def __iter__(self):
+        return iter(self.data[:self.size].tolist())
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(self.data[:self.size])
+
+    def view(self, start: int, shape):
+        """
+        A zero-copy NumPy view of the memory from start, reshaped to shape.
+
+        Reads see the program's writes and writes go straight to the program.  The view is only valid until the memory
+        next grows past its capacity, so take a fresh one rather than holding on to it.
+        """
+        n = int(np.prod(shape))
+        if start + n > self.size:
+            self._grow(start + n - 1)
+        return self.data[start:start + n].reshape(shape)
+
+
 class IntCodeComputer:
 
-    def __init__(self, program: List[int]=None, input_user=None, debug=DebugFlag.OFF, pause_on_output: bool=False, pause_on_input: bool=False):
+    def __init__(self, program: List[int]=None, input_user=None, debug=DebugFlag.OFF, pause_on_output: bool=False, pause_on_input: bool=False,
+            array_memory: bool=False, on_input=None, on_output=None, output_group: int=1):
         """
         An IntCode Computer.
 
@@ -70,15 +145,30 @@ class IntCodeComputer:
             debug_level: A debug flag to spit out more information.  Higher levels are more verbose, 0 is off.
             pause_on_output: A boolean flag to enable breaking the program on an output command. 
             pause_on_input: A boolean flag to enable breaking the program on an input command. 
+            array_memory: Hold memory in an ArrayMemory, so regions of it can be viewed as NumPy arrays with memory_view()
+            on_input: A callable returning the next input value.  It takes priority over input_user, and the program never
+                      pauses for input.
+            on_output: A callable taking output values, called once every `output_group` outputs with that many values.
+                       Output handed to it is not stored in output_value, and the program never pauses for output.
+            output_group: How many output values to collect per on_output call, eg. 3 for (x, y, tile) triples.
+                          Halting part way through a group raises a ValueError.
+
+        Thread safety:  An instance is not safe to share between threads, the input generator and the memory are
+        used without locking.  Separate instances share no state, so any number of them can run in separate threads.
+        Use ThreadSafeIntCodeComputer when one machine has to be driven from more than one thread.
         """
         self.status = StatusFlag.NOT_READY   # This is set to indicate a progam break, or pause
         self.idx = 0   
         self.output_value = None                  # The instruction pointer
         self.relative_base = 0           # The relative address base
+        self.steps = 0                   # The number of instructions executed
+        self.break_at = None             # Pause the program once this many instructions have been executed
+        self.log = None                  # The ExecutionLog, when recording
 
         if program is not None:
             self.set_program(program)  # Store the original program for reference
         
+        self.array_memory = array_memory
         self.memory = Memory()  # Copy it to memory for working
         
         self.input_user = None
@@ -88,6 +178,10 @@ class IntCodeComputer:
         self.debug_flag = debug
         self.pause_on_output = pause_on_output
         self.pause_on_input = pause_on_input
+        self.on_input = on_input
+        self.on_output = on_output
+        self.output_group = output_group
+        self._output_buffer = []
         
         self.op_codes = {
             1: self.add_x,
@@ -117,13 +211,21 @@ class IntCodeComputer:
             self.program = program
             # self.load_program()
             self.output_value = None
+            self._output_buffer = []
             self.idx = 0
             self.relative_base = 0
+            self.steps = 0
             self.status = StatusFlag.READY
 
     def load_program(self, program: List[int] = None):
         program = program or self.program
-        self.memory = Memory(program.copy())
+        self.memory = ArrayMemory(program) if self.array_memory else Memory(program.copy())
+
+    def memory_view(self, start: int, shape):
+        # A zero-copy view of part of memory, see ArrayMemory.view
+        if not isinstance(self.memory, ArrayMemory):
+            raise TypeError("Memory views need an IntCodeComputer(array_memory=True)")
+        return self.memory.view(start, shape)
 
     def get_readable_value(self, idx: int, mode: ModeFlag = ModeFlag.Positional):
         value = self.memory[idx]
@@ -202,6 +304,30 @@ class IntCodeComputer:
 
         self.load_program()
         self.idx = 0
+        self.steps = 0
+        self._output_buffer = []
+
+    def record(self, snapshot_every: int=10000):
+        """
+        Start recording this computer into an ExecutionLog, stored on self.log
+
+        Every input value, every output value and a snapshot of the machine state every `snapshot_every` instructions
+        are kept, which is enough to replay the session later without whatever was driving it.  If the program is
+        already running, the current state is snapshotted straight away so the log can be replayed from here.
+        """
+        self.log = ExecutionLog(self.program, snapshot_every)
+        if self.status is not StatusFlag.READY:
+            self.log.start_steps = self.steps
+            self.log.snapshot(self)
+        return self.log
+
+    def run_until(self, steps: int, input_vals=None):
+        # Run, pausing once the total instruction count reaches steps
+        self.break_at = steps
+        try:
+            self.run(input_vals)
+        finally:
+            self.break_at = None
 
     def run(self, input_vals=None, debug: int=None):
         if input_vals is not None:
@@ -221,11 +347,24 @@ class IntCodeComputer:
         
         self.status = StatusFlag.READY
         while self.idx < len(self.program) and self.status is StatusFlag.READY:
-            self.debug(str(self.memory), DebugFlag.EXTREME)
+            if self.steps == self.break_at:
+                self.status = StatusFlag.PAUSED
+                break
+            if self.log is not None and self.steps >= self.log.next_snapshot:
+                self.log.snapshot(self)
+
+            if self.debug_flag is DebugFlag.EXTREME:
+                # Only build the memory dump when it will be printed
+                self.debug(str(self.memory), DebugFlag.EXTREME)
             opcode, modeflag = self.parse_opcode(self.memory[self.idx])
             if opcode == 99:
                 self.debug("Program Halt", DebugFlag.LOW) 
                 self.status = StatusFlag.FINISHED
+                if self._output_buffer:
+                    # A group the program never finished, on_output can't be called with it
+                    values, self._output_buffer = self._output_buffer, []
+                    raise ValueError("Program halted part way through an output group of {}: {}".format(
+                        self.output_group, values))
                 break
             try:
                 operation = self.op_codes[opcode]
@@ -233,6 +372,9 @@ class IntCodeComputer:
                print("Bad OP Code: {}.  Exiting".format(opcode))
             else:
                 operation(modeflag)
+                # An input instruction that paused for want of a value has not executed yet
+                if opcode != 3 or self.status is StatusFlag.READY:
+                    self.steps += 1
 
     def _pad_modeflag(self, modes: List[ModeFlag], n: int, v: ModeFlag=ModeFlag.Positional):
         # This is to ensure that the mode list is the right length.
@@ -244,7 +386,8 @@ class IntCodeComputer:
 
     def _pre_operation(self, modeflag: List[ModeFlag], n_args: int, writeable_operation=True)-> List[int]:
         # This gets fired at the start of any operation
-        self.debug(self.memory[self.idx:self.idx+n_args+1], DebugFlag.HIGH)
+        if self.debug_flag.value >= DebugFlag.HIGH.value:
+            self.debug(self.memory[self.idx:self.idx+n_args+1], DebugFlag.HIGH)
 
         modeflag = self._pad_modeflag(modeflag, n_args)
 
@@ -276,11 +419,12 @@ class IntCodeComputer:
         loc, = self._pre_operation(modeflag, 1)
         self.debug("|{}| INP: -> [{}]".format(self.idx, loc), DebugFlag.MEDIUM)
 
-        if self.pause_on_input:
+        if self.on_input is not None:
+            v = int(self.on_input())
+        elif self.pause_on_input:
             self.status = StatusFlag.PAUSED
             return
-
-        if self.input_user is not None:
+        elif self.input_user is not None:
             try:
                 v = int(next(self.input_user))
             except StopIteration:
@@ -290,6 +434,9 @@ class IntCodeComputer:
         else:
             v = int(input("Enter Input Value: "))
 
+        if self.log is not None:
+            self.log.inputs.append(v)
+
         self.memory[loc] = v
         self.idx += 2
 
@@ -298,9 +445,19 @@ class IntCodeComputer:
         v, = self._pre_operation(modeflag, 1, writeable_operation=False)
         self.debug("|{}| OUT {}".format(self.idx, v), DebugFlag.MEDIUM)
         self.debug("!! Program Output: {} !!".format(v), DebugFlag.LOW)
-        self.set_output_value(v)
+        if self.log is not None:
+            self.log.outputs.append(v)
         self.idx += 2
 
+        if self.on_output is not None:
+            self._output_buffer.append(v)
+            if len(self._output_buffer) == self.output_group:
+                values = self._output_buffer
+                self._output_buffer = []
+                self.on_output(*values)
+            return
+
+        self.set_output_value(v)
         if self.pause_on_output:
             self.status = StatusFlag.PAUSED
 
@@ -346,6 +503,279 @@ class IntCodeComputer:
 
         self.relative_base += v1
         self.idx += 2
+
+
+class _QueueReader:
+
+    # Iterator over a queue.Queue that stops, rather than blocks, when the queue is empty.
+    # This makes it a drop-in input_user, an empty queue pauses the computer just like an exhausted generator
+    # Iterators of unknown length are kept as a fallback, read lazily whenever the queue is empty
+
+    def __init__(self, q: queue.Queue, timeout: float=None):
+        self.queue = q
+        self.timeout = timeout
+        self.fallbacks = collections.deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        while self.fallbacks:
+            try:
+                return next(self.fallbacks[0])
+            except StopIteration:
+                self.fallbacks.popleft()
+        if self.timeout is None:
+            raise StopIteration
+        try:
+            return self.queue.get(timeout=self.timeout)
+        except queue.Empty:
+            raise StopIteration
+
+
+class ThreadSafeIntCodeComputer(IntCodeComputer):
+
+    def __init__(self, program: List[int]=None, input_user=None, input_timeout: float=None, **kwargs):
+        """
+        An IntCode Computer that can be driven from several threads at once.
+
+        Input values go into a queue.Queue, so any thread can push_input() while another is running the program.
+        run() and the output accessors hold a lock, so one thread runs the machine at a time.
+
+        Arguments:
+            input_timeout: Seconds to wait on an empty input queue before pausing.  None pauses straight away.
+
+        The other arguments are the same as for IntCodeComputer.
+        """
+        self._lock = threading.RLock()
+        self.input_queue = queue.Queue()
+        self.input_timeout = input_timeout
+        self._reader = _QueueReader(self.input_queue, input_timeout)
+        super().__init__(program, input_user=input_user, **kwargs)
+        self.input_user = self._reader
+
+    def set_input_values(self, input_vals):
+        # Inputs are appended to the queue, not replaced
+        # Sized collections are queued up front, other iterables may be endless so are read lazily once the queue is empty
+        if input_vals is not None:
+            if not hasattr(input_vals, '__iter__'):
+                input_vals = [input_vals]
+            if isinstance(input_vals, collections.abc.Sized):
+                for v in input_vals:
+                    self.input_queue.put(v)
+            else:
+                self._reader.fallbacks.append(iter(input_vals))
+
+    def push_input(self, v: int):
+        self.input_queue.put(v)
+
+    def run(self, input_vals=None, debug: int=None):
+        with self._lock:
+            super().run(input_vals, debug)
+
+    def take_outputs(self) -> List[int]:
+        # Atomically collect and clear the outputs produced so far
+        with self._lock:
+            outputs = self.output_value
+            self.output_value = None
+        if outputs is None:
+            return []
+        return outputs if isinstance(outputs, list) else [outputs]
+
+
+def _run_job(job):
+    # Run a (program, input_vals) job to completion and return its outputs, module level so it can be pickled
+    program, input_vals = job
+    computer = IntCodeComputer(program, input_user=list(input_vals))
+    computer.run()
+    outputs = computer.output_value
+    if outputs is None:
+        return []
+    return outputs if isinstance(outputs, list) else [outputs]
+
+
+class PoolRunner:
+
+    # Shared by the pool runners: run (program, input_vals) jobs on an executor, see run_batch()
+
+    executor_cls = None
+
+    def __init__(self, max_workers: int=None):
+        self.max_workers = max_workers or os.cpu_count()
+
+    def run_batch(self, jobs) -> List[List[int]]:
+        # Run (program, input_vals) jobs, returning the outputs of each in order
+        with self.executor_cls(self.max_workers) as pool:
+            return list(pool.map(_run_job, jobs))
+
+
+class ThreadPoolRunner(PoolRunner):
+
+    """
+    Run batches of independent IntCode machines across a pool of threads.
+
+    On a free-threaded CPython build the machines run in parallel, with no pickling of programs or results.
+    With the GIL this is no faster than running them one after another, see benchmark_runners().
+    """
+
+    executor_cls = ThreadPoolExecutor
+
+    def run_computers(self, computers: List[IntCodeComputer]) -> List[IntCodeComputer]:
+        # Run already configured computers in place, each one in a single thread
+        with ThreadPoolExecutor(self.max_workers) as pool:
+            list(pool.map(lambda computer: computer.run(), computers))
+        return computers
+
+
+class ProcessPoolRunner(PoolRunner):
+
+    # The same batches across processes.  Every job and result is pickled, so there is no running computers in place.
+
+    executor_cls = ProcessPoolExecutor
+
+
+def gil_enabled() -> bool:
+    # sys._is_gil_enabled() only exists from 3.13, earlier interpreters always have the GIL
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def benchmark_runners(program: List[int]=None, input_vals=(1, ), n_jobs: int=32, workers=(1, 2, 4, 8)):
+    """
+    Time a batch of identical jobs serially, on the thread pool and on the process pool for each worker count.
+    Defaults to the day 9 BOOST program in test mode.
+    """
+    if program is None:
+        with open('input/09.txt') as f:
+            program = list(map(int, f.read().strip().split(',')))
+
+    jobs = [(program, input_vals)] * n_jobs
+
+    print("Python {} | GIL {}".format(sys.version.split()[0], "enabled" if gil_enabled() else "disabled"))
+
+    start_time = time.perf_counter()
+    expected = [_run_job(job) for job in jobs]
+    serial = time.perf_counter() - start_time
+    print("{:<10}{:>8}{:>12.1f}ms{:>9.2f}x".format("serial", 1, serial * 1000, 1))
+
+    for runner_cls, label in ((ThreadPoolRunner, "threads"), (ProcessPoolRunner, "processes")):
+        for n in workers:
+            start_time = time.perf_counter()
+            result = runner_cls(n).run_batch(jobs)
+            elapsed = time.perf_counter() - start_time
+            assert result == expected, "{} runner produced different outputs".format(label)
+            print("{:<10}{:>8}{:>12.1f}ms{:>9.2f}x".format(label, n, elapsed * 1000, serial / elapsed))
+
+
+class ExecutionLog:
+
+    def __init__(self, program: List[int], snapshot_every: int=10000):
+        """
+        A recording of an IntCode session: the input tape, the output stream and periodic machine snapshots.
+
+        Arguments:
+            program: The program that was run
+            snapshot_every: Instructions between snapshots.  Smaller is a faster seek but a bigger log.
+
+        Each snapshot is a tuple of (steps, idx, relative_base, n_inputs, n_outputs, memory), where n_inputs and
+        n_outputs are how far along the tapes the machine was at that instruction count.
+        """
+        self.program = list(program)
+        self.snapshot_every = snapshot_every
+        self.inputs = []
+        self.outputs = []
+        self.snapshots = []
+        self.start_steps = 0         # The instruction count recording started at
+        self.next_snapshot = snapshot_every
+
+    def snapshot(self, computer: 'IntCodeComputer'):
+        self.snapshots.append((computer.steps, computer.idx, computer.relative_base,
+            len(self.inputs), len(self.outputs), list(computer.memory)))
+        self.next_snapshot = computer.steps + self.snapshot_every
+
+    def to_dict(self):
+        return {
+            'program': self.program,
+            'snapshot_every': self.snapshot_every,
+            'start_steps': self.start_steps,
+            'inputs': self.inputs,
+            'outputs': self.outputs,
+            'snapshots': self.snapshots
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        log = cls(d['program'], d['snapshot_every'])
+        log.start_steps = d['start_steps']
+        log.inputs = list(d['inputs'])
+        log.outputs = list(d['outputs'])
+        log.snapshots = [tuple(snap) for snap in d['snapshots']]
+        return log
+
+    def save(self, filename: str):
+        # Snapshots are mostly the same memory over and over, which compresses very well
+        with open(filename, 'wb') as f:
+            f.write(zlib.compress(json.dumps(self.to_dict(), separators=(',', ':')).encode(), 9))
+
+    @classmethod
+    def load(cls, filename: str):
+        with open(filename, 'rb') as f:
+            return cls.from_dict(json.loads(zlib.decompress(f.read())))
+
+
+class Replay:
+
+    def __init__(self, log: ExecutionLog):
+        """
+        Deterministic replay of a recorded session.
+
+        The recorded input tape is fed straight back to a fresh computer, so nothing that drove the original session
+        (a player, a robot, a renderer) is needed, and the replay costs only the time to run the program.
+        """
+        self.log = log
+        self._snapshot_steps = [snap[0] for snap in log.snapshots]
+
+    def run(self) -> IntCodeComputer:
+        # Replay the whole session and check the program produces the recorded outputs
+        computer = self.seek(self.log.start_steps)
+        computer.run()
+        outputs = computer.output_value
+        if not isinstance(outputs, list):
+            outputs = [] if outputs is None else [outputs]
+        if outputs != self.log.outputs:
+            raise ReplayError("Replay diverged from the recorded outputs")
+        return computer
+
+    def seek(self, steps: int) -> IntCodeComputer:
+        """
+        Return a computer paused after exactly `steps` instructions, or finished if the session ended before that.
+
+        The nearest snapshot at or before the target is restored, the input tape is rewound to match, and the
+        remaining instructions are run.  The computer only holds output values produced after the snapshot.
+        """
+        if steps < self.log.start_steps:
+            raise ReplayError("Cannot seek to {}, recording started at {}".format(steps, self.log.start_steps))
+
+        computer = IntCodeComputer(self.log.program)
+        i = bisect_right(self._snapshot_steps, steps)
+
+        if i == 0:
+            computer.reset_program()
+            n_inputs = 0
+        else:
+            computer.steps, computer.idx, computer.relative_base, n_inputs, _, memory = self.log.snapshots[i - 1]
+            computer.memory = Memory(memory)
+
+        computer.status = StatusFlag.PAUSED
+        computer.set_input_values(self.log.inputs[n_inputs:])
+        computer.run_until(steps)
+        return computer
+
+
 ##  Tests
 
 def assert_program_memory(program:List[int], input_val, expected_output: List[int], debug: int=DebugFlag.OFF):
@@ -447,12 +877,129 @@ def test_memory():
 
     print("Memory tests passed")
 
+def test_array_memory():
+    memory = ArrayMemory(range(10))
+    assert len(memory) == 10
+    assert memory[15] == 0
+    assert len(memory) == 16
+    memory[20] = -1
+    assert len(memory) == 21
+    assert memory[-1] == -1
+    assert memory[2:5] == [2, 3, 4]
+
+    # Views share the program's memory
+    computer = IntCodeComputer([1101, 3, 4, 9, 1101, 5, 6, 10, 99, 0, 0], array_memory=True)
+    computer.run()
+    view = computer.memory_view(9, (1, 2))
+    assert view.tolist() == [[7, 11]]
+    view[0, 0] = 100
+    assert computer.memory[9] == 100
+
+    print("Array memory tests passed")
+
+def test_callbacks():
+    # Output (input, input * 2) pairs for each input until a 0 is entered
+    program = [3, 100, 1006, 100, 16, 4, 100, 1002, 100, 2, 101, 4, 101, 1105, 1, 0, 99]
+    inputs = iter([1, 2, 3, 0])
+    pairs = []
+
+    computer = IntCodeComputer(program, on_input=lambda: next(inputs), on_output=lambda a, b: pairs.append((a, b)), output_group=2)
+    computer.run()
+    assert computer.status is StatusFlag.FINISHED
+    assert pairs == [(1, 2), (2, 4), (3, 6)]
+    assert computer.output_value is None
+
+    # Halting with half a pair is an error, and a reset starts the next run with no leftover outputs
+    program = [104, 1, 104, 2, 104, 3, 99]
+    pairs = []
+    computer = IntCodeComputer(program, on_output=lambda a, b: pairs.append((a, b)), output_group=2)
+    try:
+        computer.run()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Expected a ValueError for an unfinished output group")
+    assert computer.status is StatusFlag.FINISHED
+    assert pairs == [(1, 2)]
+
+    computer = IntCodeComputer([104, 1, 104, 2, 104, 3, 3, 0, 104, 4, 99], input_user=[], on_output=lambda a, b: pairs.append((a, b)), output_group=2)
+    computer.run()
+    assert computer.status is StatusFlag.PAUSED
+    computer.reset_program()
+    computer.run(input_vals=[0])
+    assert pairs == [(1, 2), (1, 2), (1, 2), (3, 4)], pairs
+
+    print("Callback tests passed")
+
+def test_replay():
+    # Add pairs of input values until a 0 is entered, outputting each sum
+    program = [3, 100, 1006, 100, 17, 3, 101, 1, 100, 101, 102, 4, 102, 1105, 1, 0, 99, 99]
+    inputs = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+
+    computer = IntCodeComputer(program, input_user=inputs)
+    log = computer.record(snapshot_every=5)
+    computer.run()
+    assert log.inputs == inputs
+    assert log.outputs == [3, 7, 11, 15]
+    assert len(log.snapshots) == computer.steps // 5
+
+    replayed = Replay(ExecutionLog.from_dict(log.to_dict())).run()
+    assert replayed.memory == computer.memory
+    assert replayed.steps == computer.steps
+
+    # Seeking lands on the same state as running that far from the start
+    for steps in range(computer.steps + 1):
+        reference = IntCodeComputer(program, input_user=inputs)
+        reference.run_until(steps)
+        seeked = Replay(log).seek(steps)
+        assert seeked.steps == reference.steps == steps
+        assert (seeked.idx, seeked.memory) == (reference.idx, reference.memory)
+
+    # Recording can start part way through a session
+    computer = IntCodeComputer(program, input_user=inputs)
+    computer.run_until(12)
+    log = computer.record(snapshot_every=5)
+    computer.run()
+    assert Replay(log).run().memory == computer.memory
+
+    print("Replay tests passed")
+
+def test_threads():
+    program = [3, 11, 3, 12, 1, 11, 12, 13, 4, 13, 99, -1 , -1, 9]  # Add two input numbers together
+
+    jobs = [(program, (i, i + 1)) for i in range(20)]
+    assert ThreadPoolRunner(4).run_batch(jobs) == [[2 * i + 1] for i in range(20)]
+
+    computers = [IntCodeComputer(program, input_user=(i, 2)) for i in range(20)]
+    ThreadPoolRunner(4).run_computers(computers)
+    assert [c.output_value for c in computers] == [i + 2 for i in range(20)]
+
+    # Feed a thread safe computer from another thread while it waits on input
+    computer = ThreadSafeIntCodeComputer(program, input_timeout=5)
+    feeder = threading.Thread(target=lambda: [computer.push_input(v) for v in (3, 5)])
+    feeder.start()
+    computer.run()
+    feeder.join()
+    assert computer.take_outputs() == [8]
+    assert computer.status is StatusFlag.FINISHED
+
+    # Endless input iterators are read as needed, not drained up front
+    computer = ThreadSafeIntCodeComputer(program, input_user=itertools.count(4))
+    computer.run()
+    assert computer.take_outputs() == [9]
+
+    print("Thread tests passed")
+
 def run_all_tests():
     tests_day2()
     tests_day5()
     tests_day7()
     test_memory()
     tests_day_9()
+    test_array_memory()
+    test_callbacks()
+    test_replay()
+    test_threads()
 
 # run_all_tests()
 
@@ -0,0 +1,378 @@
+import random
+import time
+from collections import namedtuple
+from typing import List
+
+import numpy as np
+
+import aoc
+import five
+import intcode
+import two
+
+"""
+Differential harness for the Intcode interpreters.
+
+There are three separate interpreters in here:
+    five.run_program         - function table with bitmask modes, opcodes 1-8
+    two.run_program          - NumPy int32 memory, opcodes 1, 2 and 99 only, positional only
+    intcode.IntCodeComputer  - the full computer, opcodes 1-9 and all three modes
+
+Every case is run on each engine that supports all of the opcodes and modes the case uses.  The final memory and
+the outputs are compared against the reference engine (the IntCodeComputer) and the timings are printed side by side.
+
+Any new engine gets added with register_engine() and must pass run_harness() before it is used in a solution.
+"""
+
+# An engine is a callable run(program, inputs) -> (memory, outputs), along with the features it supports.
+#   value_range is the (min, max) word an engine can hold, None if unbounded.  Cases whose reference result
+#   does not fit are skipped for that engine rather than reported as a mismatch.
+Engine = namedtuple("Engine", ("name", "run", "opcodes", "modes", "value_range"))
+
+# A case is a program, its input values and the set of opcodes and parameter modes it relies on
+Case = namedtuple("Case", ("name", "program", "inputs", "opcodes", "modes"))
+
+DAY2_OPCODES = frozenset((1, 2, 99))
+DAY5_OPCODES = frozenset(range(1, 9)) | {99}
+DAY9_OPCODES = frozenset(range(1, 10)) | {99}
+
+POSITIONAL = frozenset((0, ))
+DAY5_MODES = frozenset((0, 1))
+DAY9_MODES = frozenset((0, 1, 2))
+
+INT32_RANGE = (np.iinfo(np.int32).min, np.iinfo(np.int32).max)
+
+REFERENCE = 'intcode'
+
+engines = {}
+
+
+def register_engine(name: str, run, opcodes=DAY9_OPCODES, modes=DAY9_MODES, value_range=None):
+    engines[name] = Engine(name, run, frozenset(opcodes), frozenset(modes), value_range)
+
+
+def as_outputs(output_value) -> List[int]:
+    # IntCodeComputer.output_value is None, a single int or a list depending on how many values were output
+    if output_value is None:
+        return []
+    if isinstance(output_value, list):
+        return output_value
+    return [output_value]
+
+
+##  Engines
+
+def run_intcode(program: List[int], inputs: List[int]):
+    computer = intcode.IntCodeComputer(program, input_user=list(inputs))
+    computer.run()
+    return list(computer.memory), as_outputs(computer.output_value)
+
+
+def run_array_memory(program: List[int], inputs: List[int]):
+    computer = intcode.IntCodeComputer(program, input_user=list(inputs), array_memory=True)
+    computer.run()
+    return list(computer.memory), as_outputs(computer.output_value)
+
+
+def run_callbacks(program: List[int], inputs: List[int]):
+    tape = iter(inputs)
+    outputs = []
+    computer = intcode.IntCodeComputer(program, on_input=lambda: next(tape), on_output=outputs.append)
+    computer.run()
+    return list(computer.memory), outputs
+
+
+def run_threadsafe(program: List[int], inputs: List[int]):
+    computer = intcode.ThreadSafeIntCodeComputer(program, input_user=list(inputs))
+    computer.run()
+    return list(computer.memory), computer.take_outputs()
+
+
+def run_five(program: List[int], inputs: List[int]):
+    # five.py talks to the terminal directly, so shadow input() and print() in its namespace for the run
+    tape = iter(inputs)
+    outputs = []
+
+    def fake_print(*args):
+        if args and args[0] == "-- PROGRAM OUTPUT: ":
+            outputs.append(args[1])
+
+    five.input = lambda prompt='': next(tape)
+    five.print = fake_print
+    try:
+        memory = five.run_program(program)
+    finally:
+        del five.input
+        del five.print
+    return memory, outputs
+
+
+def run_two(program: List[int], inputs: List[int]):
+    memory = np.array(program, dtype=np.int32)
+    with np.errstate(over='ignore'):
+        # Wrapped values show up as a mismatch against the reference, no need for the warning too
+        two.run_program(memory)
+    return memory.tolist(), []
+
+
+register_engine(REFERENCE, run_intcode)
+register_engine('callbacks', run_callbacks)
+register_engine('threadsafe', run_threadsafe)
+register_engine('array', run_array_memory, value_range=(np.iinfo(np.int64).min, np.iinfo(np.int64).max))
+register_engine('five', run_five, opcodes=DAY5_OPCODES, modes=DAY5_MODES)
+register_engine('two', run_two, opcodes=DAY2_OPCODES, modes=POSITIONAL, value_range=INT32_RANGE)
+
+
+##  Cases
+
+def known_cases() -> List[Case]:
+    cases = []
+
+    # Day 2
+    for i, program in enumerate([
+            [1,9,10,3,2,3,11,0,99,30,40,50],
+            [1,0,0,0,99],
+            [2,3,0,3,99],
+            [2,4,4,5,99,0],
+            [1,1,1,4,99,5,6,0,99]]):
+        cases.append(Case(f"day2_test{i}", program, [], DAY2_OPCODES, POSITIONAL))
+
+    program = aoc.read_program('02.txt')
+    program[1], program[2] = 12, 2
+    cases.append(Case("day2_input", program, [], DAY2_OPCODES, POSITIONAL))
+
+    # Day 5
+    compare_8 = [3,21,1008,21,8,20,1005,20,22,107,8,21,20,1006,20,31,
+        1106,0,36,98,0,0,1002,21,125,20,4,20,1105,1,46,104,
+        999,1105,1,46,1101,1000,1,20,4,20,1105,1,46,98,99]
+    for i, (program, input_val) in enumerate([
+            ([3,9,8,9,10,9,4,9,99,-1,8], 8),
+            ([3,9,8,9,10,9,4,9,99,-1,8], 7),
+            ([3,9,7,9,10,9,4,9,99,-1,8], 7),
+            ([3,9,7,9,10,9,4,9,99,-1,8], 9),
+            ([3,3,1108,-1,8,3,4,3,99], 8),
+            ([3,3,1108,-1,8,3,4,3,99], 2),
+            ([3,3,1107,-1,8,3,4,3,99], 1),
+            ([3,3,1107,-1,8,3,4,3,99], 9),
+            ([3,12,6,12,15,1,13,14,13,4,13,99,-1,0,1,9], 0),
+            ([3,12,6,12,15,1,13,14,13,4,13,99,-1,0,1,9], 2),
+            ([3,3,1105,-1,9,1101,0,0,12,4,12,99,1], 0),
+            ([3,3,1105,-1,9,1101,0,0,12,4,12,99,1], 2),
+            (compare_8, 7),
+            (compare_8, 8),
+            (compare_8, 9)]):
+        cases.append(Case(f"day5_test{i}", program, [input_val], DAY5_OPCODES, DAY5_MODES))
+
+    program = aoc.read_program('05.txt')
+    cases.append(Case("day5_input_1", program, [1], DAY5_OPCODES, DAY5_MODES))
+    cases.append(Case("day5_input_5", program, [5], DAY5_OPCODES, DAY5_MODES))
+
+    # Day 9
+    for i, program in enumerate([
+            [104, 0, 104, 1, 104, 2, 99],
+            [109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99],
+            [1102,34915192,34915192,7,4,7,99,0],
+            [104,1125899906842624,99]]):
+        cases.append(Case(f"day9_test{i}", program, [], DAY9_OPCODES, DAY9_MODES))
+
+    program = aoc.read_program('09.txt')
+    cases.append(Case("day9_input_1", program, [1], DAY9_OPCODES, DAY9_MODES))
+
+    return cases
+
+
+def random_program(rng: random.Random, n_instructions: int, opcodes=DAY5_OPCODES, modes=DAY5_MODES, data_size: int=16,
+        max_value: int=20):
+    """
+    Generate a random, valid Intcode program and a matching input tape.
+
+    The program is a block of code followed by a block of data.  All reads and writes land in the data block, so the
+    code is never modified, and every jump is forward to the start of a later instruction, so the program always halts.
+
+    If relative mode is requested the program starts with 109 <data_start> and never adjusts the base again, so
+    relative parameters are plain offsets into the data block.
+
+    Returns the program, the input values and the set of opcodes actually used.
+    """
+    read_modes = sorted(modes)
+    body_ops = sorted(op for op in opcodes if op not in (9, 99))
+    if 1 not in modes:
+        # Jump targets are immediate values, no jumps without immediate mode
+        body_ops = [op for op in body_ops if op not in (5, 6)]
+
+    lengths = {1: 4, 2: 4, 3: 2, 4: 2, 5: 3, 6: 3, 7: 4, 8: 4}
+    relative = 2 in modes and 9 in opcodes
+
+    ops = [rng.choice(body_ops) for _ in range(n_instructions)]
+    starts = []
+    addr = 2 if relative else 0
+    for op in ops:
+        starts.append(addr)
+        addr += lengths[op]
+    halt_addr = addr
+    data_start = halt_addr + 1
+
+    def read_param(mode):
+        if mode == 1:
+            return rng.randint(-max_value, max_value)
+        elif mode == 2:
+            return rng.randrange(data_size)
+        return data_start + rng.randrange(data_size)
+
+    def write_param():
+        mode = 2 if relative and rng.random() < 0.5 else 0
+        return mode, read_param(mode)
+
+    program = [109, data_start] if relative else []
+    inputs = []
+    used = {99, 9} if relative else {99}
+
+    for i, op in enumerate(ops):
+        used.add(op)
+        if op in (1, 2, 7, 8):
+            m1, m2 = rng.choice(read_modes), rng.choice(read_modes)
+            m3, p3 = write_param()
+            program += [op + 100 * m1 + 1000 * m2 + 10000 * m3, read_param(m1), read_param(m2), p3]
+        elif op == 3:
+            m1, p1 = write_param()
+            program += [op + 100 * m1, p1]
+            inputs.append(rng.randint(-max_value, max_value))
+        elif op == 4:
+            m1 = rng.choice(read_modes)
+            program += [op + 100 * m1, read_param(m1)]
+        elif op in (5, 6):
+            m1 = rng.choice(read_modes)
+            target = rng.choice(starts[i + 1:] + [halt_addr])
+            program += [op + 100 * m1 + 1000, read_param(m1), target]
+
+    program.append(99)
+    program += [rng.randint(-max_value, max_value) for _ in range(data_size)]
+
+    return program, inputs, frozenset(used)
+
+
+def random_cases(n: int, seed: int=0, n_instructions: int=50) -> List[Case]:
+    rng = random.Random(seed)
+    cases = []
+    for i in range(n):
+        # Day 2 programs are only add and multiply, keep the values small so the int32 engine stays in range
+        for label, opcodes, modes, max_value in [
+                ('day2', DAY2_OPCODES, POSITIONAL, 2),
+                ('day5', DAY5_OPCODES, DAY5_MODES, 20),
+                ('day9', DAY9_OPCODES, DAY9_MODES, 20)]:
+            program, inputs, used = random_program(rng, n_instructions, opcodes, modes, max_value=max_value)
+            cases.append(Case(f"random_{label}_{i}", program, inputs, used, modes))
+    return cases
+
+
+##  Harness
+
+def supports(engine: Engine, case: Case) -> bool:
+    return case.opcodes <= engine.opcodes and case.modes <= engine.modes
+
+
+def in_range(engine: Engine, memory: List[int], outputs: List[int]) -> bool:
+    if engine.value_range is None:
+        return True
+    lo, hi = engine.value_range
+    return all(lo <= v <= hi for v in memory) and all(lo <= v <= hi for v in outputs)
+
+
+def same_memory(a: List[int], b: List[int]) -> bool:
+    # The expanding Memory may have grown past the program, unread cells are 0 either way
+    n = max(len(a), len(b))
+    return list(a) + [0] * (n - len(a)) == list(b) + [0] * (n - len(b))
+
+
+def time_run(engine: Engine, case: Case, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = engine.run(list(case.program), list(case.inputs))
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def check_case(case: Case, repeat: int=1):
+    """
+    Run a case on every supporting engine.
+
+    Returns a dict of engine name -> (status, seconds), where status is one of 'ok', 'MISMATCH', 'ERROR' or 'skipped'
+    """
+    reference = engines[REFERENCE]
+    (ref_memory, ref_outputs), ref_time = time_run(reference, case, repeat)
+    results = {REFERENCE: ('ok', ref_time)}
+
+    for name, engine in engines.items():
+        if name == REFERENCE:
+            continue
+        if not supports(engine, case) or not in_range(engine, ref_memory, ref_outputs):
+            results[name] = ('skipped', None)
+            continue
+        try:
+            (memory, outputs), elapsed = time_run(engine, case, repeat)
+        except Exception as e:
+            results[name] = (f'ERROR {e!r}', None)
+            continue
+
+        if same_memory(memory, ref_memory) and list(outputs) == list(ref_outputs):
+            results[name] = ('ok', elapsed)
+        else:
+            results[name] = ('MISMATCH', elapsed)
+
+    return results
+
+
+def run_harness(n_random: int=100, seed: int=0, repeat: int=3, verbose: bool=False) -> bool:
+    """
+    Run all known and random cases through every registered engine.
+
+    Prints a table of best-of-repeat timings for the known cases, and per engine totals for the cases it shares with
+    the reference.  Returns True if no engine produced a mismatch or an error.
+    """
+    names = list(engines)
+    totals = {name: [0.0, 0.0, 0] for name in names}  # engine time, reference time, count
+    failures = []
+
+    header = "{:<18}".format("case") + "".join("{:>14}".format(name) for name in names)
+    print(header)
+    print("-" * len(header))
+
+    for case in known_cases() + random_cases(n_random, seed=seed):
+        results = check_case(case, repeat=repeat)
+
+        for name, (status, elapsed) in results.items():
+            if status not in ('ok', 'skipped'):
+                failures.append((case.name, name, status))
+            if status == 'ok':
+                totals[name][0] += elapsed
+                totals[name][1] += results[REFERENCE][1]
+                totals[name][2] += 1
+
+        if verbose or not case.name.startswith('random'):
+            row = "{:<18}".format(case.name)
+            for name in names:
+                status, elapsed = results[name]
+                row += "{:>14}".format(f"{elapsed*1000:.3f}ms" if status == 'ok' else status[:12])
+            print(row)
+
+    print()
+    print("{:<12}{:>8}{:>14}{:>14}{:>10}".format("engine", "cases", "time", "reference", "speedup"))
+    for name in names:
+        engine_time, ref_time, count = totals[name]
+        speedup = ref_time / engine_time if engine_time else float('nan')
+        print("{:<12}{:>8}{:>12.1f}ms{:>12.1f}ms{:>9.2f}x".format(name, count, engine_time*1000, ref_time*1000, speedup))
+
+    print()
+    if failures:
+        for case_name, name, status in failures:
+            print(f"FAIL {name} on {case_name}: {status}")
+    else:
+        print("All engines agree")
+
+    return not failures
+
+
+if __name__ == '__main__':
+    run_harness()
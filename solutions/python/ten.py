@@ -1,6 +1,10 @@
 from collections import defaultdict
 import math
 
+import numpy as np
+
+from aoc.grid import Grid
+
 '''
 The Problem: 
 	* Given a 2D ASCII map
@@ -18,6 +22,7 @@ class AsteroidMap:
 	def __init__(self, map_str = None):
 
 		self.map_str = map_str
+		self.grid = None		# Grid of asteroids, True where there is one
 		self.members = set([])
 		self.destroyed_asteroids = list()
 		self.width = 0
@@ -34,16 +39,17 @@ class AsteroidMap:
 		if self.map_str[width-1] == '\r':
 			width -= 1
 
-		for y, line in enumerate(self.map_str.split('\n')):
-			if len(line) == 0:
-				continue
+		lines = [line.rstrip('\r') for line in self.map_str.split('\n') if len(line)]
+		for line in lines:
 			assert len(line) == width, "{} != {}".format(len(line), width)
-			for x, pos in enumerate(line):
-				if pos == '#':
-					self.members.add((x, y))
+
+		# One byte per position, compared all at once
+		chars = np.frombuffer("".join(lines).encode(), dtype=np.uint8).reshape(len(lines), width)
+		self.grid = Grid.from_array(chars == ord('#'), fill=False)
+		self.members = set(self.grid.positions(True))
 
 		self.width = width
-		self.height = y+1
+		self.height = len(lines)
 
 
 	@property
@@ -60,6 +66,13 @@ class AsteroidMap:
 		norm = math.sqrt(self.vector_norm_sq(vector))
 		return (round(x / norm,10), round(y/norm, 10))
 
+	def direction(self, vector: tuple) -> tuple:
+		# The vector divided through by the gcd of its parts, exact however large the map, and the same for every
+		# point along a line of sight
+		x, y = vector
+		g = math.gcd(x, y)
+		return (x // g, y // g)
+
 	def vector_norm_sq(self, vector):
 		x, y = vector
 		return x**2 + y**2
@@ -70,7 +83,7 @@ class AsteroidMap:
 		for point in self.members:
 			if point == start_point:
 				continue
-			res[point]  = self.unit_vector(self.difference_vector(start_point, point))
+			res[point]  = self.direction(self.difference_vector(start_point, point))
 
 		# Invert this for a useful lookup table
 		inv = defaultdict(set)
@@ -79,17 +92,44 @@ class AsteroidMap:
 		return res, inv
 
 	def find_best_location(self):
-		best_loc = None
-		best_cnt = -1
-
-		for p in self.members:
-			cnt = len(self.detectable_asteroids(p))
-
-			if cnt > best_cnt:
-				best_cnt = cnt
-				best_loc = p
-
-		return best_loc, best_cnt
+		points, counts = self.visibility_counts()
+		if not len(points):
+			return None, -1
+		best = np.argmax(counts)
+		return tuple(map(int, points[best])), int(counts[best])
+
+	def visibility_counts(self, chunk_size: int = 1 << 22):
+		"""
+		How many asteroids can be seen from each asteroid, for all of them at once.
+
+		For a block of stations the differences to every asteroid are reduced by their gcd to a direction, each
+		direction packed into one int64 key, and the distinct keys in each row counted after a sort.  Blocks are sized
+		to hold about chunk_size differences, so memory stays bounded on maps with tens of thousands of asteroids.
+
+		Returns the (n, 2) array of asteroid positions and the count for each.
+		"""
+		points = np.array(sorted(self.members), dtype=np.int64).reshape(-1, 2)
+		n = len(points)
+		counts = np.zeros(n, dtype=np.int64)
+		x, y = points[:, 0], points[:, 1]
+		span_y = 2 * self.height + 1
+
+		rows = max(1, chunk_size // max(1, n))
+		for start in range(0, n, rows):
+			stop = min(n, start + rows)
+			dx = x[np.newaxis, :] - x[start:stop, np.newaxis]
+			dy = y[np.newaxis, :] - y[start:stop, np.newaxis]
+			g = np.gcd(dx, dy)
+			own = g == 0  # Each station against itself
+			g[own] = 1
+			keys = (dx // g + self.width) * span_y + (dy // g + self.height)
+			keys[own] = -1
+
+			keys.sort(axis=1)
+			# Distinct keys in each row, less the station's own -1
+			counts[start:stop] = (keys[:, 1:] != keys[:, :-1]).sum(axis=1)
+
+		return points, counts
 
 	def detectable_asteroids(self, point):
 
@@ -117,25 +157,15 @@ class AsteroidMap:
 
 		points = points or self.members
 
-		visual_map = ['.'*self.width for y in range(self.height)]
+		visual_map = self.grid.char_array('.#', (0, self.width-1), (0, self.height-1))
+		for x, y in highlighted_points or ():
+			visual_map[y, x] = '\u25A0'
+		if start_point is not None:
+			visual_map[start_point[1], start_point[0]] = '*'
 
 		print()
-		for p in self.members:
-			if p == start_point:
-				ch = '*'
-			elif highlighted_points is not None and p in highlighted_points:
-				ch = '\u25A0'
-			else:
-				ch = '#'
-			line = visual_map[p[1]]
-			ch_idx = p[0]
-			if ch_idx == 0:
-				visual_map[p[1]] = ch + line[1:]
-			else:
-				visual_map[p[1]]= line[:ch_idx ] + ch + line[ch_idx+1:]
-
 		for line in visual_map:
-			print(line)
+			print("".join(line))
 
 		print()
 
@@ -143,6 +173,7 @@ class AsteroidMap:
 		if point not in self.members:
 			raise ValueError("No asteroid found at point ", point)
 		self.members.remove(point)
+		self.grid[point] = False
 		self.destroyed_asteroids.append(point)
 
 	def destroy(self, point):
@@ -291,6 +322,25 @@ def tests1():
 
 	print("Tests 1 passed")
 
+def tests3():
+	data = AsteroidMap('#.#\n')
+	assert data.direction((4, 2)) == (2, 1)
+	assert data.direction((-3, 0)) == (-1, 0)
+	# Neighbouring long sight lines, which sqrt and rounding to 10 places merge
+	assert data.unit_vector((99999, 99998)) == data.unit_vector((99998, 99997))
+	assert data.direction((99999, 99998)) != data.direction((99998, 99997))
+
+	# The vectorised counts agree with the per point dict counts, chunked or not
+	rng = np.random.default_rng(0)
+	lines = [''.join('#' if c else '.' for c in row) for row in rng.random((40, 50)) < 0.3]
+	data = AsteroidMap('\n'.join(lines) + '\n')
+	expected = [len(data.detectable_asteroids(tuple(map(int, p)))) for p in sorted(data.members)]
+	for chunk_size in (1 << 22, 1000, 1):
+		points, counts = data.visibility_counts(chunk_size)
+		assert counts.tolist() == expected
+
+	print("Tests 3 passed")
+
 def tests2():
 	test_map = '''\
 .#..##.###...#######
@@ -333,8 +383,11 @@ def tests2():
 	assert d_ast[298] == (11, 1)
 	print("Tests 2 passed")
 
-# tests1()
+if __name__ == '__main__':
+	# tests1()
+
+	# tests2()
 
-# tests2()
-part1()  # (17, 22)  288
-part2()  # (6, 16) -> 616
\ No newline at end of file
+	# tests3()
+	part1()  # (17, 22)  288
+	part2()  # (6, 16) -> 616
\ No newline at end of file
@@ -1,8 +1,12 @@
 import os
 import collections
+import heapq
+import time
+from bisect import bisect_left, bisect_right
 
-in_file = os.path.join(os.getcwd(), 'input', 'three03.txt')
-assert os.path.exists(in_file), "Missing input file: {}".format(in_file)
+import numpy as np
+
+in_file = os.path.join(os.getcwd(), 'input', '03.txt')
 
 # The idea is to be able to traverse an (x,y) grid based off input instructions
 #
@@ -82,23 +86,287 @@ def run_wire(instructions: list):
 	
 	return hist_p
 
-def run_program(instruction1: list, instruction2: list):
-	matches = set.intersection(set(run_wire(instruction1)), set(run_wire(instruction2)))
-	matches.remove(Point(0,0))
+# Expanding every step into a Point is O(wire length).  Instead, keep each wire as its axis aligned segments, each with
+# the number of steps taken to reach its start.  The steps to any point on a segment are then just arithmetic.
 
-	return sorted([abs(p.x) + abs(p.y) for p in matches])[0]
+Segment = collections.namedtuple("Segment", ("x1", "y1", "x2", "y2", "steps"))
 
-# There are two sets of instructions for every game, we need to find the intersections between the two
+def wire_segments(instructions: list):
+	segments = []
+	cur_p = Point(0, 0)
+	steps = 0
 
-def run_program_2(instruction1: list, instruction2: list):
-	hist_1 = run_wire(instruction1)
-	hist_2 = run_wire(instruction2)
+	for instruction in instructions:
+		direction, value = instruction[0], int(instruction[1:])
+		new_p = move_point(cur_p, direction, value)
+		segments.append(Segment(cur_p.x, cur_p.y, new_p.x, new_p.y, steps))
+		steps += value
+		cur_p = new_p
 
-	matches = set.intersection(set(hist_1), set(hist_2))
-	matches.remove(Point(0,0))
+	return segments
+
+def split_segments(segments: list):
+	# Horizontal and vertical segments, zero length moves count as horizontal
+	horizontals = [s for s in segments if s.y1 == s.y2]
+	verticals = [s for s in segments if s.y1 != s.y2]
+	return horizontals, verticals
+
+class _ActiveSet:
+
+	# The active horizontals of the sweep.  Every horizontal has a fixed rank by (y, index), known before the sweep
+	# starts, so the active set is a Fenwick tree of counts over ranks: O(log n) to add or remove one, and
+	# O(log n) for each active rank reported in a range
+
+	def __init__(self, n: int):
+		self.n = n
+		self.tree = [0] * (n + 1)
+		self.top = 1 << max(0, n.bit_length() - 1)
+
+	def add(self, rank: int, delta: int):
+		i = rank + 1
+		while i <= self.n:
+			self.tree[i] += delta
+			i += i & -i
+
+	def count_below(self, rank: int) -> int:
+		# Active ranks < rank
+		total = 0
+		i = rank
+		while i > 0:
+			total += self.tree[i]
+			i -= i & -i
+		return total
+
+	def kth(self, k: int) -> int:
+		# The rank of the k-th (1 based) active entry
+		i = 0
+		step = self.top
+		while step:
+			if i + step <= self.n and self.tree[i + step] < k:
+				i += step
+				k -= self.tree[i]
+			step >>= 1
+		return i
+
+	def ranks_between(self, lo: int, hi: int):
+		# Active ranks in [lo, hi)
+		for k in range(self.count_below(lo) + 1, self.count_below(hi) + 1):
+			yield self.kth(k)
+
+def perpendicular_crossings(horizontals: list, verticals: list):
+	# Sweep a vertical line across x.  Horizontal segments are active between their end x values, and each vertical
+	# segment picks up the active horizontals within its y range.  Yields (x, y, steps to the point along both wires)
+	# O((segments + crossings) log segments)
+
+	events = []
+	for i, h in enumerate(horizontals):
+		events.append((min(h.x1, h.x2), 0, i))  # Insert before queries before removal, the ends are inclusive
+		events.append((max(h.x1, h.x2), 2, i))
+	for i, v in enumerate(verticals):
+		events.append((v.x1, 1, i))
+	events.sort()
+
+	keys = sorted((h.y1, i) for i, h in enumerate(horizontals))  # (y, horizontal index) by rank
+	rank = [0] * len(horizontals)
+	for r, (y, i) in enumerate(keys):
+		rank[i] = r
+
+	active = _ActiveSet(len(horizontals))
+	for x, kind, i in events:
+		if kind == 0:
+			active.add(rank[i], 1)
+		elif kind == 2:
+			active.add(rank[i], -1)
+		else:
+			v = verticals[i]
+			lo, hi = min(v.y1, v.y2), max(v.y1, v.y2)
+			lo_rank = bisect_left(keys, (lo, -1))
+			hi_rank = bisect_right(keys, (hi, len(horizontals)))
+			for r in active.ranks_between(lo_rank, hi_rank):
+				y, j = keys[r]
+				h = horizontals[j]
+				yield x, y, h.steps + abs(x - h.x1) + v.steps + abs(y - v.y1)
+
+def collinear_crossings(segments_1: list, segments_2: list, axis: int):
+	# Overlapping segments on the same line, axis 0 for horizontal lines and 1 for vertical
+	# The steps are linear along an overlap, so only the overlap's ends and the points either side of the origin
+	# can be the closest or the fewest steps away
+	#
+	# Each line is swept by segment start.  Both wires keep a heap of their segments still open, by end.  A new segment
+	# first drops the other wire's segments that ended before it starts, and every one left overlaps it, so the sweep
+	# is O((segments + overlaps) log segments)
+
+	def line(s):
+		return (s.y1, s.x1, s.x2) if axis == 0 else (s.x1, s.y1, s.y2)
+
+	lines = collections.defaultdict(list)
+	for wire, segments in enumerate((segments_1, segments_2)):
+		for n, s in enumerate(segments):
+			c, a, b = line(s)
+			lines[c].append((min(a, b), max(a, b), wire, n, s))
+
+	for c, intervals in lines.items():
+		intervals.sort(key=lambda i: i[0])
+		open_segments = ([], [])  # (end, order, segment) heaps, one per wire
+		for lo, hi, wire, n, s in intervals:
+			others = open_segments[1 - wire]
+			while others and others[0][0] < lo:
+				heapq.heappop(others)
+			for hi_o, _, other in others:
+				s1, s2 = (s, other) if wire == 0 else (other, s)
+				start, end = lo, min(hi, hi_o)
+				for p in {start, end, -1, 0, 1}:
+					if start <= p <= end:
+						steps = s1.steps + abs(p - line(s1)[1]) + s2.steps + abs(p - line(s2)[1])
+						yield (p, c, steps) if axis == 0 else (c, p, steps)
+			heapq.heappush(open_segments[wire], (hi, n, s))
+
+def iter_crossings(instruction1: list, instruction2: list):
+	# All (x, y, steps) where the wires cross, excluding the origin.  A point may come up more than once, along with
+	# every combination of wire segments through it, so the smallest steps seen for a point are its first visits
+	h_1, v_1 = split_segments(wire_segments(instruction1))
+	h_2, v_2 = split_segments(wire_segments(instruction2))
+
+	for crossings in (perpendicular_crossings(h_1, v_2), perpendicular_crossings(h_2, v_1),
+			collinear_crossings(h_1, h_2, 0), collinear_crossings(v_1, v_2, 1)):
+		for x, y, steps in crossings:
+			if (x, y) != (0, 0):
+				yield x, y, steps
 
-	# Now need to calculate total number of steps to each of these match points
-	return sorted(map(lambda x: hist_1.index(x) + hist_2.index(x), matches))[0]
+def run_program(instruction1: list, instruction2: list):
+	return min(abs(x) + abs(y) for x, y, _ in iter_crossings(instruction1, instruction2))
+
+# There are two sets of instructions for every game, we need to find the intersections between the two
+
+def run_program_2(instruction1: list, instruction2: list):
+	# The total number of steps to the nearest crossing
+	return min(steps for _, _, steps in iter_crossings(instruction1, instruction2))
+
+# Many wires at once.  The file is parsed a chunk at a time into compact (direction, length) arrays per wire, each
+# wire's visited cells are packed into int64 keys along with the step each was first reached at, and the cells are
+# counted across wires with a sort.  No Point is ever made.
+
+DIRECTIONS = 'RLUD'
+DX = np.array([1, -1, 0, 0])
+DY = np.array([0, 0, 1, -1])
+
+PACK_OFFSET = 1 << 31  # y is stored offset in the low 32 bits of an int64 key, x is the signed high half
+
+CrossingCells = collections.namedtuple("CrossingCells", ("x", "y", "n_wires", "steps"))
+
+def pack(x, y):
+	return (np.asarray(x, dtype=np.int64) << 32) | (np.asarray(y, dtype=np.int64) + PACK_OFFSET)
+
+def unpack(keys):
+	return keys >> 32, (keys & 0xFFFFFFFF) - PACK_OFFSET
+
+def iter_wire_moves(filename, chunk_size: int=1 << 16):
+	# Yield (directions, lengths) arrays for each wire (line) in the file, reading chunk_size characters at a time
+
+	directions, lengths = [], []
+
+	def add_tokens(text):
+		for token in text.split(','):
+			token = token.strip()
+			if token:
+				directions.append(DIRECTIONS.index(token[0].upper()))
+				lengths.append(int(token[1:]))
+
+	def wire():
+		moves = np.array(directions, dtype=np.int8), np.array(lengths, dtype=np.int64)
+		directions.clear()
+		lengths.clear()
+		return moves
+
+	tail = ''
+	with open(filename) as f:
+		while True:
+			chunk = f.read(chunk_size)
+			if not chunk:
+				break
+			text = tail + chunk
+			# Only parse up to the last separator, the rest may be half a token
+			cut = max(text.rfind(','), text.rfind('\n')) + 1
+			text, tail = text[:cut], text[cut:]
+
+			lines = text.split('\n')
+			for line in lines[:-1]:
+				add_tokens(line)
+				if directions:
+					yield wire()
+			add_tokens(lines[-1])
+
+	add_tokens(tail)
+	if directions:
+		yield wire()
+
+def wire_cells(directions, lengths):
+	# The packed keys of every cell a wire visits, other than the origin, and the step each is first reached at
+	dx = np.repeat(DX[directions], lengths)
+	dy = np.repeat(DY[directions], lengths)
+	keys = pack(np.cumsum(dx), np.cumsum(dy))
+
+	keys, first = np.unique(keys, return_index=True)
+	keep = keys != pack(0, 0)
+	return keys[keep], first[keep] + 1
+
+def multi_wire_crossings(wires, k: int=2) -> CrossingCells:
+	"""
+	Every cell visited by at least k of the wires.
+
+	Arguments:
+		wires: An iterable of (directions, lengths) arrays, eg. iter_wire_moves(filename)
+		k: The number of wires that must visit a cell
+
+	Returns arrays of the cells' x and y, how many wires visit each, and the total of the first-visit steps of each
+	wire that visits it.
+	"""
+	all_keys, all_steps = [], []
+	for directions, lengths in wires:
+		keys, steps = wire_cells(directions, lengths)
+		all_keys.append(keys)
+		all_steps.append(steps)
+
+	if not all_keys:
+		empty = np.zeros(0, dtype=np.int64)
+		return CrossingCells(empty, empty, empty, empty)
+
+	keys = np.concatenate(all_keys)
+	steps = np.concatenate(all_steps)
+	order = np.argsort(keys, kind='stable')
+	keys, steps = keys[order], steps[order]
+
+	# Each wire's keys are unique, so the length of a run of equal keys is the number of wires visiting the cell
+	starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+	n_wires = np.diff(np.append(starts, len(keys)))
+	total_steps = np.add.reduceat(steps, starts)
+
+	mask = n_wires >= k
+	x, y = unpack(keys[starts][mask])
+	return CrossingCells(x, y, n_wires[mask], total_steps[mask])
+
+def run_n_wires(filename=in_file, k: int=2):
+	# The closest cell, by Manhattan distance, and the fewest combined steps, of the cells on at least k wires
+	cells = multi_wire_crossings(iter_wire_moves(filename), k)
+	if len(cells.x) == 0:
+		return None, None
+	return int((np.abs(cells.x) + np.abs(cells.y)).min()), int(cells.steps.min())
+
+def zigzag(n: int):
+	# n teeth along the x axis, every tooth's top and bottom on the same two lines as all the others
+	return ["R2", "U1", "R2", "D1"] * n
+
+def scaling_check(sizes=(2000, 4000, 8000)):
+	# Time collinear_crossings on zigzag wires, which only overlap O(n) times, a linear sweep roughly doubles each time
+	timings = []
+	for n in sizes:
+		h_1, _ = split_segments(wire_segments(zigzag(n)))
+		h_2, _ = split_segments(wire_segments(["D1"] + zigzag(n)))
+		start_time = time.perf_counter()
+		found = sum(1 for _ in collinear_crossings(h_1, h_2, 0))
+		timings.append(time.perf_counter() - start_time)
+		print("{:>8} teeth {:>8} crossings {:>10.3f} s".format(n, found, timings[-1]))
+	return timings
 
 def run_tests():
 
@@ -126,13 +394,29 @@ def run_tests():
 	assert run_program_2(ti3A, ti3B) == 610
 	assert run_program_2(ti4A, ti4B) == 410
 
+	# Wires running along each other, and a wire crossing itself before the other wire reaches that point
+	assert run_program(["R10"], ["U1", "R3", "D1", "R4"]) == 3
+	assert run_program_2(["R10"], ["U1", "R3", "D1", "R4"]) == 3 + 5
+	assert run_program_2(["R5", "U2", "L2", "D4"], ["D1", "R3", "U2"]) == 3 + 5
+
+	# Many wire mode agrees with the two wire answers
+	for wire_a, wire_b, closest, fewest in [(ti2A, ti2B, 6, 30), (ti3A, ti3B, 159, 610), (ti4A, ti4B, 135, 410)]:
+		wires = [(np.array([DIRECTIONS.index(i[0]) for i in w]), np.array([int(i[1:]) for i in w])) for w in (wire_a, wire_b)]
+		cells = multi_wire_crossings(wires)
+		assert (np.abs(cells.x) + np.abs(cells.y)).min() == closest
+		assert cells.steps.min() == fewest
+
+	# Collinear overlaps scale with the overlaps found, not segments squared
+	small, large = scaling_check((2000, 8000))
+	assert large < 8 * small + 0.05, "collinear_crossings is not scaling linearly: {:.3f} s, {:.3f} s".format(small, large)
+
 	print("Tests OK!")
 
 # Run with file input
-def run1():
+def run1(filename=in_file):
 	print()
 	print("Part 1")
-	with open(in_file) as f:
+	with open(filename) as f:
 		in1, in2 = f.read().strip().split('\n')
 		in1 = in1.split(',')
 		in2 = in2.split(',')
@@ -140,16 +424,18 @@ def run1():
 	print(run_program(in1, in2))
 
 # Run with file input
-def run2():
+def run2(filename=in_file):
 	print()
 	print("Part 2")
-	with open(in_file) as f:
+	with open(filename) as f:
 		in1, in2 = f.read().strip().split('\n')
 		in1 = in1.split(',')
 		in2 = in2.split(',')
 
 	print(run_program_2(in1, in2))
 
-# run_tests()
-run1() # 260
-run2() # 15612
\ No newline at end of file
+if __name__ == '__main__':
+	# run_tests()
+	run1() # 260
+	run2() # 15612
+	# print(run_n_wires(k=2))  # (260, 15612)
\ No newline at end of file
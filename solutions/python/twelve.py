@@ -1,10 +1,12 @@
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from itertools import combinations, cycle
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
-# For plotting
-from matplotlib import pyplot as plt
-import mpl_toolkits.mplot3d.axes3d as plt3d
-import matplotlib.animation as animation
+import numpy as np
 
 
 class Planet:
@@ -105,17 +107,17 @@ class Simulation:
                     cur_vx, cur_vy, cur_vz = list(zip(*[planet.velocity for planet in self.planets]))
                     
                     # Check X
-                    if repeats[0] is not None and cur_x == init_x and cur_vx == init_v:
+                    if repeats[0] is None and cur_x == init_x and cur_vx == init_v:
                         print("X Repeat found at ", self.cnt)
                         repeats[0] = self.cnt
 
                     # Check y
-                    if repeats[1] is not None and cur_y == init_y and cur_vy == init_v:
+                    if repeats[1] is None and cur_y == init_y and cur_vy == init_v:
                         print("Y Repeat found at ", self.cnt)
                         repeats[1] = self.cnt
                     
                     # Check z
-                    if repeats[2] is not None and cur_z == init_z and cur_vz == init_v:
+                    if repeats[2] is None and cur_z == init_z and cur_vz == init_v:
                         print("Z Repeat found at ", self.cnt)
                         repeats[2] = self.cnt
 
@@ -164,10 +166,338 @@ class Simulation:
         def calculate_energy(self):
                 return sum(planet.energy() for planet in self.planets)
 
+        def energies(self):
+                return [planet.energy() for planet in self.planets]
+
         def get_state(self):
 
                 return tuple(((tuple(planet.position), tuple(planet.velocity)) for planet in self.planets))
 
+class ArraySimulation:
+        """
+        The same simulation held as (n_bodies, 3) integer arrays of positions and velocities.
+
+        The pull on a body along an axis is the number of bodies ahead of it less the number behind.  Two gravity
+        kernels work that out:
+
+                pairwise: sums the signs of every pairwise difference, O(n^2) per step in preallocated buffers
+                sorted: sorts each axis and counts with searchsorted, O(n log n) per step, for very many bodies
+                auto: pairwise below SORTED_CROSSOVER bodies, sorted from there on
+        """
+
+        KERNELS = ('pairwise', 'sorted', 'auto')
+        SORTED_CROSSOVER = 32  # Bodies, from benchmark_kernels()
+
+        def __init__(self, initial_positions, dtype=np.int64, gravity: str = 'auto'):
+
+                if gravity not in self.KERNELS:
+                        raise ValueError("Unknown gravity kernel: {}, expected one of {}".format(gravity, self.KERNELS))
+
+                self.position = np.array(initial_positions, dtype=dtype).reshape(-1, 3)
+                self.velocity = np.zeros_like(self.position)
+                self.cnt = 0
+
+                n = len(self.position)
+                if gravity == 'auto':
+                        gravity = 'pairwise' if n < self.SORTED_CROSSOVER else 'sorted'
+                self.gravity = gravity
+                self.apply_gravity = getattr(self, '_{}_gravity'.format(gravity))
+
+                self._dv = np.empty((n, 3), dtype=dtype)
+                if gravity == 'pairwise':
+                        self._diff = np.empty((n, n, 3), dtype=dtype)
+
+        def _pairwise_gravity(self):
+                # diff[i, j] = sign(r_j - r_i), summed over j is the pull on i
+                pos = self.position
+                np.subtract(pos[np.newaxis, :, :], pos[:, np.newaxis, :], out=self._diff)
+                np.sign(self._diff, out=self._diff)
+                self.velocity += self._diff.sum(axis=1, out=self._dv)
+
+        def _sorted_gravity(self):
+                # Ahead of r is everything after its last place in the sorted axis, behind is everything before its first
+                pos = self.position
+                n = len(pos)
+                ordered = np.sort(pos, axis=0)
+                for axis in range(3):
+                        behind = np.searchsorted(ordered[:, axis], pos[:, axis], side='left')
+                        ahead = n - np.searchsorted(ordered[:, axis], pos[:, axis], side='right')
+                        np.subtract(ahead, behind, out=self._dv[:, axis], casting='unsafe')
+                self.velocity += self._dv
+
+        def step(self, k: int = 1):
+                # Advance k steps
+                pos, vel = self.position, self.velocity
+                apply_gravity = self.apply_gravity
+                for _ in range(k):
+                        apply_gravity()
+                        pos += vel
+                self.cnt += k
+
+        def run(self, n_steps: int, do_print = False):
+                self.step(n_steps)
+                if do_print:
+                        for r, v in zip(self.position, self.velocity):
+                                print("<pos: x={}, y={}, z={}, vel: x={}, y={} z={}>".format(*r, *v))
+                        print()
+
+        def energies(self):
+                return np.abs(self.position).sum(axis=1) * np.abs(self.velocity).sum(axis=1)
+
+        def calculate_energy(self):
+                return int(self.energies().sum())
+
+        def get_state(self):
+                return tuple((tuple(map(int, r)), tuple(map(int, v))) for r, v in zip(self.position, self.velocity))
+
+HEADROOM_DTYPES = (np.int16, np.int32, np.int64)
+
+def step_bound(position, velocity, n_bodies: int, n_steps: int) -> int:
+        # Largest coordinate or velocity magnitude possible within n_steps, velocities change by < n_bodies per step
+        p = int(np.abs(position).max(initial=0))
+        v = int(np.abs(velocity).max(initial=0))
+        pull = n_bodies - 1
+        return max(p + n_steps * v + n_steps * (n_steps + 1) // 2 * pull, v + n_steps * pull)
+
+def headroom_dtype(position, velocity, n_bodies: int, n_steps: int):
+        # The smallest dtype that can run n_steps from this state without wrapping
+        bound = step_bound(position, velocity, n_bodies, n_steps)
+        for dtype in HEADROOM_DTYPES:
+                # The pairwise differences need twice the range of the positions
+                if 2 * bound < np.iinfo(dtype).max:
+                        return dtype
+        raise OverflowError("Positions too large for int64")
+
+class BatchSimulation:
+        """
+        Many independent universes stepped together, positions and velocities held as (U, n_bodies, 3) arrays.
+
+        The dtype is the smallest of int16, int32 and int64 that holds the starting state with room to spare, and the
+        arrays are promoted to the next size up if the bodies ever get close to its limits, so a big batch of small
+        systems stays small in memory.
+        """
+
+        CHECK_EVERY = 16  # Steps between checks that the dtype still has headroom
+
+        def __init__(self, initial_positions, initial_velocities=None, dtype=None):
+
+                position = np.asarray(initial_positions).reshape(-1, np.shape(initial_positions)[-2], 3)
+                velocity = np.zeros_like(position) if initial_velocities is None else np.asarray(initial_velocities).reshape(position.shape)
+                self.n_universes, self.n_bodies = position.shape[:2]
+
+                # Steps left before the next headroom check, a dtype that was passed in is checked straight away
+                self.until_check = 0 if dtype is not None else self.CHECK_EVERY
+                if dtype is None:
+                        dtype = self._dtype_for(position, velocity)
+                self.position = position.astype(dtype)
+                self.velocity = velocity.astype(dtype)
+                self.cnt = 0
+                self._buffers()
+
+        def _buffers(self):
+                dtype = self.position.dtype
+                self._diff = np.empty((self.n_universes, self.n_bodies, self.n_bodies, 3), dtype=dtype)
+                self._dv = np.empty((self.n_universes, self.n_bodies, 3), dtype=dtype)
+
+        def _dtype_for(self, position, velocity):
+                return headroom_dtype(position, velocity, self.n_bodies, self.CHECK_EVERY)
+
+        def _check_dtype(self):
+                dtype = self._dtype_for(self.position, self.velocity)
+                if np.iinfo(dtype).max > np.iinfo(self.position.dtype).max:
+                        self.position = self.position.astype(dtype)
+                        self.velocity = self.velocity.astype(dtype)
+                        self._buffers()
+
+        def step(self, k: int = 1):
+                # Advance every universe k steps, checking the dtype every CHECK_EVERY steps however they're split
+                done = 0
+                while done < k:
+                        if self.until_check == 0:
+                                self._check_dtype()
+                                self.until_check = self.CHECK_EVERY
+                        n = min(self.until_check, k - done)
+                        pos, vel, diff, dv = self.position, self.velocity, self._diff, self._dv
+                        for _ in range(n):
+                                np.subtract(pos[:, np.newaxis, :, :], pos[:, :, np.newaxis, :], out=diff)
+                                np.sign(diff, out=diff)
+                                vel += diff.sum(axis=2, out=dv)
+                                pos += vel
+                        self.until_check -= n
+                        done += n
+                self.cnt += k
+
+        def energies(self):
+                # Total energy of each universe
+                potential = np.abs(self.position).sum(axis=2, dtype=np.int64)
+                kinetic = np.abs(self.velocity).sum(axis=2, dtype=np.int64)
+                return (potential * kinetic).sum(axis=1)
+
+        def axis_periods(self, max_steps: int = 10**6):
+                """
+                Steps for each axis of each universe to return to the state it has now, as a (U, 3) array, 0 where an
+                axis did not return within max_steps.  Leaves every universe max_steps, or the longest period, on.
+                """
+                init_pos, init_vel = self.position.copy(), self.velocity.copy()
+                periods = np.zeros((self.n_universes, 3), dtype=np.int64)
+                start = self.cnt
+                while self.cnt - start < max_steps and not periods.all():
+                        self.step()
+                        back = (self.position == init_pos).all(axis=1) & (self.velocity == init_vel).all(axis=1)
+                        periods[back & (periods == 0)] = self.cnt - start
+                return periods
+
+        def periods(self, max_steps: int = 10**6):
+                # Steps for each whole universe to repeat, the LCM of its axis periods, 0 where any axis did not return
+                return np.lcm.reduce(self.axis_periods(max_steps), axis=1)
+
+
+def perturbed(initial_positions, n_universes: int, scale: int = 1, seed=None):
+        # n_universes copies of initial_positions, each moved by up to scale in every coordinate, shaped (U, n, 3)
+        rng = np.random.default_rng(seed)
+        positions = np.asarray(initial_positions).reshape(-1, 3)
+        return positions + rng.integers(-scale, scale + 1, (n_universes,) + positions.shape)
+
+# Axes never interact, so each axis can be run on its own until it repeats, and the whole system repeats at the
+# least common multiple of the axis periods.
+
+Cycle = namedtuple('Cycle', ('start', 'length'))
+
+def axis_step(pos, vel):
+        # One step of a single axis, in place
+        vel += np.sign(pos[np.newaxis, :] - pos[:, np.newaxis]).sum(axis=1, dtype=vel.dtype)
+        pos += vel
+
+class AxisState:
+
+        # One axis of the system, stepped in the smallest dtype with headroom, the same check BatchSimulation makes,
+        # promoted to a wider one before it could ever wrap.  States are compared as int64 bytes whatever the dtype
+
+        CHECK_EVERY = 16
+
+        def __init__(self, positions, velocities=None):
+                pos = np.array(positions, dtype=np.int64)
+                vel = np.zeros_like(pos) if velocities is None else np.array(velocities, dtype=np.int64)
+                dtype = headroom_dtype(pos, vel, len(pos), self.CHECK_EVERY)
+                self.pos, self.vel = pos.astype(dtype), vel.astype(dtype)
+                self.until_check = self.CHECK_EVERY
+
+        def step(self):
+                if self.until_check == 0:
+                        dtype = headroom_dtype(self.pos, self.vel, len(self.pos), self.CHECK_EVERY)
+                        if np.iinfo(dtype).max > np.iinfo(self.pos.dtype).max:
+                                self.pos, self.vel = self.pos.astype(dtype), self.vel.astype(dtype)
+                        self.until_check = self.CHECK_EVERY
+                axis_step(self.pos, self.vel)
+                self.until_check -= 1
+
+        def key(self):
+                return self.pos.astype(np.int64).tobytes() + self.vel.astype(np.int64).tobytes()
+
+def axis_cycle(positions) -> Cycle:
+        # Steps for one axis to get back to its starting state.  The steps are reversible, so the first state to
+        # repeat is always the starting one
+        axis = AxisState(positions)
+        start = axis.key()
+        n = 0
+        while True:
+                axis.step()
+                n += 1
+                if not axis.vel.any() and axis.key() == start:
+                        return Cycle(0, n)
+
+def axis_cycle_brent(positions, velocities=None) -> Cycle:
+        """
+        Brent's cycle finding on one axis, for dynamics that may loop back to some later state rather than the start.
+
+        Each state is hashed to the bytes of its positions and velocities.  The hare runs ahead comparing against a
+        saved tortoise state, which jumps to the hare at every power of two, so only one saved state is needed.
+        Returns when the cycle starts and its length.  An axis with net momentum drifts forever and never returns.
+        """
+        # Find the cycle length, the smallest power of two window holding a whole cycle
+        hare = AxisState(positions, velocities)
+        tortoise = hare.key()
+        hare.step()
+        power = length = 1
+        while hare.key() != tortoise:
+                if power == length:
+                        tortoise = hare.key()
+                        power *= 2
+                        length = 0
+                hare.step()
+                length += 1
+
+        # Then the start, with the hare a cycle length ahead of the tortoise
+        tortoise = AxisState(positions, velocities)
+        hare = AxisState(positions, velocities)
+        for _ in range(length):
+                hare.step()
+        start = 0
+        while tortoise.key() != hare.key():
+                tortoise.step()
+                hare.step()
+                start += 1
+
+        return Cycle(start, length)
+
+def _axis_job(args):
+        positions, velocities, brent = args
+        if brent:
+                return axis_cycle_brent(positions, velocities)
+        return axis_cycle(positions)
+
+def find_cycle(initial_positions, initial_velocities=None, processes: bool = True, brent: bool = False) -> Cycle:
+        """
+        When, and how often, the whole system repeats.
+
+        Each axis is run on its own, in a separate process if processes is set.  The system is in its cycle once
+        every axis is, and its cycle length is the LCM of the axis lengths.  With brent, each axis uses Brent's cycle
+        finding, which also copes with initial_velocities and states that are not on the cycle.
+
+        Gravity conserves the total velocity, so a system with a nonzero total on any axis drifts off and never
+        repeats.  That raises a ValueError rather than searching forever.
+        """
+        positions = np.array(initial_positions).reshape(-1, 3)
+        velocities = None if initial_velocities is None else np.array(initial_velocities).reshape(-1, 3)
+        if velocities is not None and np.any(velocities.sum(axis=0)):
+                raise ValueError("Total velocity {} is not zero, the system drifts and never repeats".format(
+                        velocities.sum(axis=0).tolist()))
+        if velocities is not None and np.any(velocities):
+                brent = True  # Only the Brent finder starts from a moving state
+        jobs = [(positions[:, i], None if velocities is None else velocities[:, i], brent) for i in range(3)]
+
+        if processes:
+                with ProcessPoolExecutor(3) as pool:
+                        cycles = list(pool.map(_axis_job, jobs))
+        else:
+                cycles = [_axis_job(job) for job in jobs]
+
+        return Cycle(max(c.start for c in cycles), math.lcm(*(c.length for c in cycles)))
+
+def find_period(initial_positions, processes: bool = True, brent: bool = False) -> int:
+        return find_cycle(initial_positions, processes=processes, brent=brent).length
+
+def benchmark_kernels(sizes=(4, 16, 32, 64, 128, 256, 1024, 10**5), n_steps: int = 10, seed: int = 0):
+        # Time per step of each gravity kernel against the number of bodies, to place SORTED_CROSSOVER
+        rng = np.random.default_rng(seed)
+        print("{:>8}{:>14}{:>14}".format('bodies', 'pairwise ms', 'sorted ms'))
+        for n in sizes:
+                positions = rng.integers(-1000, 1000, (n, 3))
+                timings = []
+                states = []
+                for gravity in ('pairwise', 'sorted'):
+                        if gravity == 'pairwise' and n * n * 3 * 8 > 2**30:
+                                timings.append(float('nan'))  # Over a GiB of pairwise buffer
+                                continue
+                        sim = ArraySimulation(positions, gravity=gravity)
+                        start_time = time.perf_counter()
+                        sim.step(n_steps)
+                        timings.append((time.perf_counter() - start_time) / n_steps)
+                        states.append((sim.position.copy(), sim.velocity.copy()))
+                if len(states) == 2:
+                        assert all((a == b).all() for a, b in zip(*states)), "Kernels disagree at {} bodies".format(n)
+                print("{:>8}{:>14.3f}{:>14.3f}".format(n, timings[0] * 1000, timings[1] * 1000))
+
 def parse_input(input_str):
         import re
 
@@ -188,12 +518,12 @@ def parse_input(input_str):
 def assert_state(simulation, n_runs, expected_r, expected_v):
         simulation.run(n_runs)
 
-        for planet, exp_r, exp_v in zip(simulation.planets, expected_r, expected_v):
-                assert tuple(exp_r) == tuple(planet.position), "Expected {} with position {}, got {}".format(exp_r, planet.position)
-                assert tuple(exp_v) == tuple(planet.velocity), "Expected {} with velocity {}, got {}".format(exp_v, planet.velocity)
+        for (position, velocity), exp_r, exp_v in zip(simulation.get_state(), expected_r, expected_v):
+                assert tuple(exp_r) == position, "Expected position {}, got {}".format(exp_r, position)
+                assert tuple(exp_v) == velocity, "Expected velocity {}, got {}".format(exp_v, velocity)
 
 
-def test1():
+def test1(sim_class=Simulation):
         input_str = '''\
 <x=-1, y=0, z=2>
 <x=2, y=-10, z=-7>
@@ -202,7 +532,7 @@ def test1():
 '''
         init_positions = parse_input(input_str)
 
-        sim = Simulation(init_positions)
+        sim = sim_class(init_positions)
 
         assert_state(sim, 0, [(-1,0,2), (2,-10,-7), (4,-8,8), (3, 5, -1)], [(0,0,0),(0,0,0),(0,0,0),(0,0,0)])
 
@@ -212,14 +542,14 @@ def test1():
 
         sim.run(1)
 
-        planet_energy = sim.planets[0].energy() 
+        planet_energy = sim.energies()[0] 
         assert  planet_energy == 36, "Expected planet energy of {}, got {}".format(36, planet_energy )
         
         sim_energy = sim.calculate_energy()
         assert sim_energy == 179, "Expected sim energy of {}, got {}".format(179, sim_energy)
-        print("Tests 1 Passed")
+        print("Tests 1 Passed ({})".format(sim_class.__name__))
 
-def test2():
+def test2(sim_class=Simulation):
         input_str = '''\
 <x=-8, y=-10, z=0>
 <x=5, y=5, z=10>
@@ -228,18 +558,18 @@ def test2():
 '''
         init_positions = parse_input(input_str)
 
-        sim = Simulation(init_positions)
+        sim = sim_class(init_positions)
 
         assert_state(sim, 10, [(-9, -10, 1),(4, 10, 9),(8, -10, -3),(5, -10, 3)], [(-2,-2,-1),(-3,7,-2),(5, -1, -2),(0,-4,5)])
         assert_state(sim, 90, [(8,-12,-9),(13,16,-3),(-29,-11,-1),(16,-13,23)], [(-7,3,0),(3,-11,-5),(-3,7,4),(7,1,1)])
 
-        planet_energy = sim.planets[0].energy()
+        planet_energy = sim.energies()[0]
         assert  planet_energy == 290, "Expected planet energy of {}, got {}".format(290, planet_energy )
 
         sim_energy = sim.calculate_energy()
         assert sim_energy == 1940, "Expected sim energy of {}, got {}".format(1940, sim_energy)
 
-        print("Tests 2 passed")
+        print("Tests 2 passed ({})".format(sim_class.__name__))
 
 def test3():
         input_str = '''\
@@ -250,17 +580,124 @@ def test3():
 '''
         init_positions = parse_input(input_str)
 
-        sim = Simulation(init_positions)
+        for brent in (False, True):
+                counts = find_period(init_positions, brent=brent)
+                assert counts == 4686774924, counts
+
+        # Starting part way round the cycle, Brent's finder sees the same cycle
+        sim = ArraySimulation(init_positions)
+        sim.step(100)
+        cycle = find_cycle(sim.position, sim.velocity, processes=False)
+        assert cycle == Cycle(0, 4686774924), cycle
+
+        # A drifting system has no cycle to find
+        try:
+                drift = sim.velocity.copy()
+                drift[0, 0] += 1
+                find_cycle(sim.position, drift, processes=False)
+        except ValueError:
+                pass
+        else:
+                raise AssertionError("Expected a ValueError for a drifting system")
+
+        # An axis that starts small and drifts is promoted before it wraps, and agrees with int64 all the way
+        axis = AxisState([0, 10], [1000, 1000])
+        assert axis.pos.dtype == np.int16
+        pos, vel = np.array([0, 10]), np.array([1000, 1000])
+        for _ in range(100):
+                axis.step()
+                axis_step(pos, vel)
+        assert axis.pos.dtype == np.int32
+        assert (axis.pos == pos).all() and (axis.vel == vel).all()
+
+        print("Tests 3 passed")
+
+def test_batch():
+        test1_positions = parse_input('''\
+<x=-1, y=0, z=2>
+<x=2, y=-10, z=-7>
+<x=4, y=-8, z=8>
+<x=3, y=5, z=-1>
+''')
+        test2_positions = parse_input('''\
+<x=-8, y=-10, z=0>
+<x=5, y=5, z=10>
+<x=2, y=-7, z=3>
+<x=9, y=-8, z=-3>
+''')
+        # Shifting every body the same way, or swapping the axes around, keeps the periods
+        positions = np.array([test1_positions, test2_positions, np.add(test1_positions, 5), np.roll(test2_positions, 1, axis=1)])
+
+        batch = BatchSimulation(positions)
+        assert batch.position.dtype == np.int16, batch.position.dtype
+        batch.step(10)
+        assert batch.energies()[0] == 179, batch.energies()[0]
+
+        for universe in perturbed(test1_positions, 20, scale=3, seed=0), positions:
+                batch = BatchSimulation(universe)
+                batch.step(100)
+                for i in range(len(universe)):
+                        sim = ArraySimulation(universe[i])
+                        sim.step(100)
+                        assert sim.calculate_energy() == batch.energies()[i]
+
+        periods = BatchSimulation(positions).axis_periods()
+        assert periods.tolist() == [[18, 28, 44], [2028, 5898, 4702], [18, 28, 44], [4702, 2028, 5898]], periods
+        assert BatchSimulation(positions).periods().tolist() == [2772, 4686774924, 2772, 4686774924]
+        assert BatchSimulation(positions[:1]).axis_periods(max_steps=30).tolist() == [[18, 28, 0]]
+
+        # Bodies far apart promote the arrays before they overflow
+        batch = BatchSimulation([[[0, 0, 0], [20000, 0, 0]]])
+        assert batch.position.dtype == np.int32
+        batch = BatchSimulation([[[0, 0, 0], [10, 0, 0]]], [[[1000, 0, 0], [1000, 0, 0]]])
+        assert batch.position.dtype == np.int16
+        batch.step(100)
+        assert batch.position.dtype == np.int32
+        sim = ArraySimulation([[0, 0, 0], [10, 0, 0]])
+        sim.velocity[:, 0] = 1000
+        sim.step(100)
+        assert (batch.position[0] == sim.position).all()
+
+        # Single steps, as axis_periods takes them, promote just the same and only check every CHECK_EVERY steps
+        batch = BatchSimulation([[[0, 0, 0], [10, 0, 0]]], [[[1000, 0, 0], [1000, 0, 0]]])
+        checks = []
+        check_dtype = batch._check_dtype
+        batch._check_dtype = lambda: checks.append(batch.cnt) or check_dtype()
+        for _ in range(100):
+                batch.step()
+        assert batch.position.dtype == np.int32
+        assert (batch.position[0] == sim.position).all()
+        assert checks == list(range(BatchSimulation.CHECK_EVERY, 100, BatchSimulation.CHECK_EVERY)), checks
+
+        print("Batch tests passed")
+
+def test_trajectory():
+        positions = parse_input('''\
+<x=-1, y=0, z=2>
+<x=2, y=-10, z=-7>
+<x=4, y=-8, z=8>
+<x=3, y=5, z=-1>
+''')
+        with tempfile.TemporaryDirectory() as tmp:
+                filename = os.path.join(tmp, 'trajectory.npy')
+                record_trajectory(ArraySimulation(positions), 10, filename, chunk_size=3)
+
+                trajectory = Trajectory(filename)
+                assert len(trajectory) == 11
+                assert trajectory.energies()[10] == 179
+                assert [tuple(r) for r in trajectory[1][0]] == [(2,-1,1), (3, -7, -4), (1, -7, 5), (2, 2, 0)]
+                assert [tuple(v) for v in trajectory[1][1]] == [(3, -1, -1),(1, 3, 3),(-3, 1, -3),(-1, -3, 1)]
+                assert len(list(trajectory.positions())) == 11
+                del trajectory
 
-        counts = sim.run2()
-        assert counts == 4686774924, counts
+        print("Trajectory tests passed")
 
 def part1():
 
         with open('input/12.txt') as f:
                 input_str = f.read().strip()
 
-        sim = Simulation(parse_input(input_str))
+        sim = ArraySimulation(parse_input(input_str))
 
         print("Running sim 1000 steps")
         sim.run(1000)
@@ -272,23 +709,80 @@ def part2():
         with open('input/12.txt') as f:
                 input_str = f.read().strip()
 
-        sim = Simulation(parse_input(input_str))
-
-        repeats = sim.run2()
-        print("Found repeats: ", repeats)
+        period = find_period(parse_input(input_str))
+        print("Repeated state after {} steps".format(period))
         #print("Repeated state after {} steps".format(counts))
 
-def animate_sim():
-    
-    with open('input/12.txt') as f:
-        input_str = f.read().strip()
+def record_trajectory(sim, n_steps: int, filename, chunk_size: int = 1024):
+        """
+        Step sim n_steps times, writing every frame to a memory-mapped .npy file shaped (n_steps + 1, 2, n_bodies, 3),
+        frame 0 being the state before the first step and [:, 0] and [:, 1] the positions and velocities.  Frames are
+        gathered chunk_size at a time and written a chunk at once, so the file can be much larger than memory.
+        """
+        n_bodies = len(sim.position)
+        frames = np.lib.format.open_memmap(filename, mode='w+', dtype=sim.position.dtype, shape=(n_steps + 1, 2, n_bodies, 3))
+        chunk = np.empty((min(chunk_size, n_steps + 1), 2, n_bodies, 3), dtype=sim.position.dtype)
+
+        done = 0
+        while done <= n_steps:
+                n = min(len(chunk), n_steps + 1 - done)
+                for i in range(n):
+                        if done + i > 0:
+                                sim.step()
+                        chunk[i, 0] = sim.position
+                        chunk[i, 1] = sim.velocity
+                frames[done:done + n] = chunk[:n]
+                done += n
+
+        frames.flush()
+        del frames
+
+class Trajectory:
+        """
+        Playback of a file written by record_trajectory.  The file is memory mapped, only the frames looked at are read.
+        """
+
+        def __init__(self, filename):
+                self.frames = np.load(filename, mmap_mode='r')
+
+        def __len__(self):
+                return len(self.frames)
+
+        def __getitem__(self, i):
+                # (positions, velocities) of frame i
+                return self.frames[i, 0], self.frames[i, 1]
+
+        def positions(self, start: int = 0, stop=None, step: int = 1):
+                # Generator of each frame's positions
+                for i in range(start, len(self) if stop is None else stop, step):
+                        yield self.frames[i, 0]
+
+        def energies(self):
+                frames = self.frames
+                return (np.abs(frames[:, 0]).sum(axis=2, dtype=np.int64) * np.abs(frames[:, 1]).sum(axis=2, dtype=np.int64)).sum(axis=1)
+
+def animate_sim(filename=None, n_steps: int = 1000):
+    # Play back a recorded trajectory.  With no file given, one is recorded from the puzzle input into a temporary
+    # directory that is removed once the window is closed
+    from matplotlib import pyplot as plt
+    import mpl_toolkits.mplot3d.axes3d as plt3d
+    import matplotlib.animation as animation
+
+    if filename is None:
+        with open('input/12.txt') as f:
+            input_str = f.read().strip()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'twelve_trajectory.npy')
+            record_trajectory(ArraySimulation(parse_input(input_str)), n_steps, filename)
+            return animate_sim(filename)
 
-    sim = Simulation(parse_input(input_str))
+    trajectory = Trajectory(filename)
 
     f = plt.figure()
     ax = plt3d.Axes3D(f)
 
-    points = [ax.plot(*([pi] for pi in planet.position), '*')[0] for planet in sim.planets]
+    points = [ax.plot([x], [y], [z], '*')[0] for x, y, z in trajectory[0][0]]
 
     def init():
         max_size = 20
@@ -305,18 +799,23 @@ def animate_sim():
     def update(frame):
         # print(frame)
         for i, (x, y, z) in enumerate(frame):
-            points[i].set_data(x, y)
-            points[i].set_3d_properties(z)
+            points[i].set_data([x], [y])
+            points[i].set_3d_properties([z])
         return points
 
-    ani = animation.FuncAnimation(f, update, frames=(frame for frame in sim.next(1000)), init_func=init, interval=50)   
+    ani = animation.FuncAnimation(f, update, frames=trajectory.positions(), init_func=init, interval=50, save_count=len(trajectory))
     plt.show()
 
-# animate_sim()
+if __name__ == '__main__':
+        # animate_sim()
 
-# test1()
-# test2()
-# test3()
-#part1() # 5937
+        # test1()
+        # test1(ArraySimulation)
+        # test2()
+        # test2(ArraySimulation)
+        # test3()
+        # test_batch()
+        # test_trajectory()
+        #part1() # 5937
 
-part2()
+        part2()  # 376203951569712
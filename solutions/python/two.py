@@ -100,6 +100,7 @@ def part2():
 
 # part1()  # 3085697
 
-part2()  
+if __name__ == '__main__':
+	part2()
 # Noun:  94 . Verb:  25
 # Output:  9425
\ No newline at end of file